@@ -4,6 +4,10 @@
 专业的微电网规划分析工具 - 主应用入口
 """
 
+import hashlib
+import json
+from collections import OrderedDict
+
 import streamlit as st
 
 # 导入模块化功能
@@ -23,10 +27,8 @@ from modules.advanced_ui import (
     create_advanced_header, create_status_dashboard, create_advanced_sidebar,
     create_advanced_progress_display, create_advanced_kpi_dashboard
 )
-from modules.advanced_visualization import (
-    create_3d_energy_flow_chart, create_animated_daily_profile,
-    create_heatmap_analysis, create_radar_chart_comparison, create_waterfall_chart
-)
+# 高级可视化模块在display_advanced_results中按需导入，
+# 避免结果尚未生成时就加载plotly图表构建代码
 
 # ==================== 页面配置 ====================
 st.set_page_config(
@@ -36,8 +38,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# 同会话内按输入参数缓存的模拟结果条目上限（LRU淘汰）
+_SIM_CACHE_MAX_ENTRIES = 8
+
 # ==================== 主应用逻辑 ====================
 
+def _user_inputs_cache_key(user_inputs):
+    """对用户输入做确定性内容哈希，作为同会话内结果复用的缓存键"""
+    payload = json.dumps(user_inputs, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
 def main():
     """主应用函数 - 高级UI版本"""
 
@@ -82,28 +92,76 @@ def main():
         help="点击开始运行微电网规划模拟分析" if not run_button_disabled else "请先解决上述输入问题",
         disabled=run_button_disabled
     ):
-        # 6. 执行模拟分析流程
-        run_simulation_workflow(user_inputs)
-    
+        # 6. 执行模拟分析流程（复用已计算的验证结果，避免重复遍历输入）
+        run_simulation_workflow(user_inputs, input_warnings, input_errors)
+
+    elif 'current_task_id' in st.session_state:
+        # 6b. 模拟仍在后台运行：继续显示进度片段
+        _render_simulation_progress()
+
+    elif 'simulation_payload' in st.session_state:
+        # 6c. 异步模拟已完成：显示结果（按钮状态复位后依然可见）
+        payload = st.session_state.simulation_payload
+        display_advanced_results(
+            payload['simulation_results'],
+            payload['economic_params']
+        )
+
+    elif st.session_state.pop('simulation_failed', None):
+        # 6d. 模拟失败：提示后回到默认页面
+        st.error("模拟计算失败，请重试")
+        create_default_info()
+
     else:
         # 7. 显示默认信息
         create_default_info()
 
+@st.fragment(run_every=1.0)
+def _render_simulation_progress():
+    """模拟进度显示片段 - 每秒仅重绘此区域，避免整页rerun轮询"""
+    task_id = st.session_state.get('current_task_id')
+    if task_id is None:
+        return
+
+    task_result = create_advanced_progress_display(task_id, "智能微电网规划计算")
+
+    if task_result and task_result.status.value in ['completed', 'failed', 'cancelled']:
+        # 任务结束：记录结果并触发一次整页刷新来渲染结果页
+        del st.session_state.current_task_id
+
+        if task_result.status.value == 'completed':
+            st.session_state.simulation_payload = task_result.result
+
+            # 记入按输入参数哈希的会话级结果缓存（LRU上限防止内存膨胀）
+            cache_key = st.session_state.pop('pending_sim_key', None)
+            if cache_key is not None:
+                sim_cache = st.session_state.setdefault('sim_cache', OrderedDict())
+                sim_cache[cache_key] = task_result.result
+                sim_cache.move_to_end(cache_key)
+                while len(sim_cache) > _SIM_CACHE_MAX_ENTRIES:
+                    sim_cache.popitem(last=False)
+        else:
+            st.session_state.simulation_failed = True
+
+        st.rerun(scope="app")
+
 @with_error_handling(
     retry_config=RetryConfig(max_attempts=2, delay=1.0),
     show_user_message=True
 )
 @optimize_for_memory
-def run_simulation_workflow(user_inputs):
-    """执行模拟分析工作流程 - 带错误处理和内存优化"""
+def run_simulation_workflow(user_inputs, validation_warnings, validation_errors):
+    """执行模拟分析工作流程 - 带错误处理和内存优化
+
+    验证结果由main()传入，避免对同一输入字典重复执行validate_inputs。
+    """
 
     # 内存监控
     memory_monitor = MemoryMonitor()
     initial_memory = memory_monitor.get_memory_stats()
 
-    # 第一步：验证用户输入
+    # 第一步：展示输入验证结果（已在main中计算）
     st.subheader("🔍 输入验证")
-    validation_warnings, validation_errors = validate_inputs(user_inputs)
     
     # 显示警告信息
     if validation_warnings:
@@ -130,122 +188,146 @@ def run_simulation_workflow(user_inputs):
     
     # 检查是否有正在运行的任务
     if 'current_task_id' in st.session_state:
-        task_result = create_advanced_progress_display(st.session_state.current_task_id, "智能微电网规划计算")
-
-        if task_result and task_result.status.value in ['completed', 'failed', 'cancelled']:
-            # 任务完成，清理状态
-            del st.session_state.current_task_id
-
-            if task_result.status.value == 'completed':
-                # 显示高级结果分析
-                display_advanced_results(task_result.result['simulation_results'], task_result.result['economic_params'])
-                return
-            else:
-                st.error("模拟计算失败，请重试")
-                return
-        else:
-            # 任务仍在进行中
-            return
+        # 任务进行中：进度片段自行按秒刷新，无需整页rerun
+        _render_simulation_progress()
+        return
+
+    # 相同参数的模拟结果直接复用（模拟对输入是纯函数）
+    cache_key = _user_inputs_cache_key(user_inputs)
+    sim_cache = st.session_state.setdefault('sim_cache', OrderedDict())
+    cached_payload = sim_cache.get(cache_key)
+    if cached_payload is not None:
+        sim_cache.move_to_end(cache_key)
+        st.success("✅ 检测到相同参数的历史计算结果，直接复用。")
+        st.session_state.simulation_payload = cached_payload
+        display_advanced_results(
+            cached_payload['simulation_results'],
+            cached_payload['economic_params']
+        )
+        return
 
     # 启动异步模拟
     st.info("🚀 启动异步模拟计算...")
+    st.session_state.pop('simulation_payload', None)  # 新一轮模拟，丢弃旧结果
+    st.session_state.pending_sim_key = cache_key
     task_id = start_async_simulation(user_inputs)
     st.session_state.current_task_id = task_id
-    st.rerun()
+    _render_simulation_progress()
 
 @async_computation
 def start_async_simulation(user_inputs):
     """异步模拟计算函数"""
 
-    # 使用内存限制上下文和进度跟踪
-    from modules.memory_optimizer import memory_limit
-    from modules.async_processor import ProgressTracker
-    import threading
+    import gc
+    from concurrent.futures import ThreadPoolExecutor
+    from modules.async_processor import ProgressTracker, TASK_ID
 
-    # 获取当前任务ID（从线程名称中提取）
-    task_id = threading.current_thread().name.split('_')[-1] if '_' in threading.current_thread().name else "unknown"
+    # 获取当前任务ID（由任务管理器在执行前设置的上下文变量）
+    task_id = TASK_ID.get()
     tracker = ProgressTracker(task_id)
 
-    with memory_limit(500):  # 限制500MB内存使用
-
-        # 准备经济参数
-        economic_params = {
-            'grid_purchase_price': user_inputs['grid_purchase_price'],
-            'grid_sell_price': user_inputs['grid_sell_price']
-        }
-
-        # 第二步：生成负荷数据
-        tracker.update_progress(1, 6, "生成负荷数据...")
-        load_data = load_mine_load_profile(
+    # 准备经济参数
+    economic_params = {
+        'grid_purchase_price': user_inputs['grid_purchase_price'],
+        'grid_sell_price': user_inputs['grid_sell_price']
+    }
+
+    # 第二、三步：负荷数据生成（CPU密集）与气象数据获取（网络I/O）相互独立，并行执行
+    tracker.update_progress(1, 6, "并行生成负荷数据与获取气象数据...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        load_future = executor.submit(
+            load_mine_load_profile,
             user_inputs['load_type'],
             user_inputs['annual_consumption']
         )
-
-        if load_data is None:
-            raise ValueError("负荷数据生成失败")
-        
-        # 第三步：获取气象数据
-        tracker.update_progress(2, 6, "获取气象数据...")
-        weather_data = get_weather_data(
+        weather_future = executor.submit(
+            get_weather_data,
             user_inputs['latitude'],
             user_inputs['longitude'],
             user_inputs['analysis_year']
         )
+        load_data = load_future.result()
+        tracker.update_progress(2, 6, "获取气象数据...")
+        weather_data = weather_future.result()
 
-        if weather_data is None:
-            raise ConnectionError("气象数据获取失败")
+    if load_data is None:
+        raise ValueError("负荷数据生成失败")
 
-        # 第四步：计算光伏发电
-        tracker.update_progress(3, 6, "计算光伏发电...")
-        solar_power = calculate_solar_power(
+    if weather_data is None:
+        raise ConnectionError("气象数据获取失败")
+
+    # 第四、五步：光伏与风电计算只依赖气象数据，并行执行
+    tracker.update_progress(3, 6, "并行计算光伏与风力发电...")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        solar_future = executor.submit(
+            calculate_solar_power,
             weather_data,
             user_inputs['pv_capacity'],
             user_inputs['latitude'],
             user_inputs['longitude']
         )
-
-        if solar_power is None:
-            raise ValueError("光伏发电计算失败")
-
-        # 第五步：计算风力发电
-        tracker.update_progress(4, 6, "计算风力发电...")
-        wind_power = calculate_wind_power(
+        wind_future = executor.submit(
+            calculate_wind_power,
             weather_data,
             user_inputs['wind_turbine_model'],
             user_inputs['wind_turbine_count']
         )
-
-        if wind_power is None:
-            raise ValueError("风力发电计算失败")
-
-        # 第六步：进行调度模拟
-        tracker.update_progress(5, 6, "进行微电网调度模拟...")
-        simulation_results = run_simulation(
-            load_data,
-            solar_power,
-            wind_power,
-            user_inputs['battery_capacity'],
-            user_inputs['battery_power'],
-            grid_purchase_price=user_inputs['grid_purchase_price'],
-            grid_sell_price=user_inputs['grid_sell_price']
-        )
-
-        if simulation_results is None:
-            raise ValueError("微电网调度模拟失败")
-
-        # 完成计算
-        tracker.update_progress(6, 6, "计算完成！")
-
-        # 返回结果
-        return {
-            'simulation_results': simulation_results,
-            'economic_params': economic_params
-        }
+        solar_power = solar_future.result()
+        tracker.update_progress(4, 6, "计算风力发电...")
+        wind_power = wind_future.result()
+
+    # 气象数据已被光伏/风电计算消费完毕，释放最大的临时对象并回收
+    del weather_data
+    gc.collect()
+
+    if solar_power is None:
+        raise ValueError("光伏发电计算失败")
+
+    if wind_power is None:
+        raise ValueError("风力发电计算失败")
+
+    # 第六步：进行调度模拟
+    tracker.update_progress(5, 6, "进行微电网调度模拟...")
+    simulation_results = run_simulation(
+        load_data,
+        solar_power,
+        wind_power,
+        user_inputs['battery_capacity'],
+        user_inputs['battery_power'],
+        grid_purchase_price=user_inputs['grid_purchase_price'],
+        grid_sell_price=user_inputs['grid_sell_price']
+    )
+
+    if simulation_results is None:
+        raise ValueError("微电网调度模拟失败")
+
+    # 输入序列已汇入结果DataFrame，释放本地引用
+    del load_data, solar_power, wind_power
+    gc.collect()
+
+    # 完成计算
+    tracker.update_progress(6, 6, "计算完成！")
+
+    # 返回结果
+    return {
+        'simulation_results': simulation_results,
+        'economic_params': economic_params
+    }
 
 def display_advanced_results(simulation_results, economic_params):
     """显示高级结果分析"""
+    # 按需导入可视化模块（仅在有结果可显示时才需要）
+    from modules.advanced_visualization import (
+        create_3d_energy_flow_chart, create_animated_daily_profile,
+        create_heatmap_analysis, create_radar_chart_comparison, create_waterfall_chart,
+        compute_daily_averages
+    )
+
     st.markdown('<div class="sub-title">🎉 计算完成 - 智能分析结果</div>', unsafe_allow_html=True)
 
+    # 逐日降采样只做一次，供需要的图表复用
+    daily_averages = compute_daily_averages(simulation_results)
+
     # 创建标签页
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📊 KPI仪表板", "📈 高级图表", "🌐 3D分析", "🔥 热力图", "💧 能量流"
@@ -272,7 +354,7 @@ def display_advanced_results(simulation_results, economic_params):
         st.markdown("### 🌐 3D能量流动轨迹")
         st.info("💡 提示：可以拖拽旋转3D图表，滚轮缩放，双击重置视角")
 
-        flow_3d_fig = create_3d_energy_flow_chart(simulation_results)
+        flow_3d_fig = create_3d_energy_flow_chart(simulation_results, daily_averages=daily_averages)
         if flow_3d_fig:
             st.plotly_chart(flow_3d_fig, use_container_width=True)
 
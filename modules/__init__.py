@@ -18,93 +18,84 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "your-email@example.com"
 
-# 导入所有模块的主要函数，方便外部调用
-try:
-    from .validation import validate_inputs
-    from .data_handler import load_mine_load_profile, get_weather_data
-    from .simulation_engine import calculate_solar_power, calculate_wind_power, run_simulation
-    from .results_analyzer import display_results, calculate_kpis, create_sankey_chart, create_interactive_dispatch_curve
-    from .ui_components import create_sidebar, create_main_header, create_default_info
-    from .utils import convert_units, calculate_capacity_factor, calculate_lcoe
-    from .config import get_config, get_wind_turbine_info, validate_config
-    from .performance import PerformanceMonitor, clear_streamlit_cache
-    from .async_processor import task_manager, create_progress_ui, async_computation
-    from .error_handler import with_error_handling, create_error_recovery_ui, RetryConfig
-    from .memory_optimizer import create_memory_monitor_ui, optimize_for_memory, MemoryMonitor
+# 懒加载导出表 (PEP 562)：属性名 -> 所在子模块
+# 首次访问属性时才导入对应子模块，使`import modules`本身保持毫秒级，
+# 且单个子模块的导入错误只在真正使用它时才暴露，不再被静默吞掉
+_EXPORTS = {
+    # 验证模块
+    'validate_inputs': 'validation',
+    # 数据处理模块
+    'load_mine_load_profile': 'data_handler',
+    'get_weather_data': 'data_handler',
+    # 仿真引擎模块
+    'calculate_solar_power': 'simulation_engine',
+    'calculate_wind_power': 'simulation_engine',
+    'run_simulation': 'simulation_engine',
+    # 结果分析模块
+    'display_results': 'results_analyzer',
+    'calculate_kpis': 'results_analyzer',
+    'create_sankey_chart': 'results_analyzer',
+    'create_interactive_dispatch_curve': 'results_analyzer',
+    # UI组件模块
+    'create_sidebar': 'ui_components',
+    'create_main_header': 'ui_components',
+    'create_default_info': 'ui_components',
+    # 工具模块
+    'convert_units': 'utils',
+    'calculate_capacity_factor': 'utils',
+    'calculate_lcoe': 'utils',
+    # 配置管理模块
+    'get_config': 'config',
+    'get_wind_turbine_info': 'config',
+    'validate_config': 'config',
+    # 性能监控模块
+    'PerformanceMonitor': 'performance',
+    'clear_streamlit_cache': 'performance',
+    # 异步处理模块
+    'task_manager': 'async_processor',
+    'create_progress_ui': 'async_processor',
+    'async_computation': 'async_processor',
+    # 错误处理模块
+    'with_error_handling': 'error_handler',
+    'create_error_recovery_ui': 'error_handler',
+    'RetryConfig': 'error_handler',
+    # 内存优化模块
+    'create_memory_monitor_ui': 'memory_optimizer',
+    'optimize_for_memory': 'memory_optimizer',
+    'MemoryMonitor': 'memory_optimizer',
+    # 高级UI模块
+    'create_advanced_header': 'advanced_ui',
+    'create_status_dashboard': 'advanced_ui',
+    'create_advanced_sidebar': 'advanced_ui',
+    'create_advanced_progress_display': 'advanced_ui',
+    'create_advanced_kpi_dashboard': 'advanced_ui',
+    # 高级可视化模块
+    'create_3d_energy_flow_chart': 'advanced_visualization',
+    'create_animated_daily_profile': 'advanced_visualization',
+    'create_heatmap_analysis': 'advanced_visualization',
+    'create_radar_chart_comparison': 'advanced_visualization',
+    'create_waterfall_chart': 'advanced_visualization',
+    'compute_daily_averages': 'advanced_visualization',
+}
 
-    # 导入高级UI组件
-    from .advanced_ui import (
-        create_advanced_header, create_status_dashboard, create_advanced_sidebar,
-        create_advanced_progress_display, create_advanced_kpi_dashboard
-    )
+# 定义包的公共接口
+__all__ = list(_EXPORTS)
 
-    # 导入高级可视化
-    from .advanced_visualization import (
-        create_3d_energy_flow_chart, create_animated_daily_profile,
-        create_heatmap_analysis, create_radar_chart_comparison, create_waterfall_chart
-    )
 
-    # 定义包的公共接口
-    __all__ = [
-        # 验证模块
-        'validate_inputs',
-        # 数据处理模块
-        'load_mine_load_profile',
-        'get_weather_data',
-        # 仿真引擎模块
-        'calculate_solar_power',
-        'calculate_wind_power',
-        'run_simulation',
-        # 结果分析模块
-        'display_results',
-        'calculate_kpis',
-        'create_sankey_chart',
-        'create_interactive_dispatch_curve',
-        # UI组件模块
-        'create_sidebar',
-        'create_main_header',
-        'create_default_info',
-        # 工具模块
-        'convert_units',
-        'calculate_capacity_factor',
-        'calculate_lcoe',
-        # 配置管理模块
-        'get_config',
-        'get_wind_turbine_info',
-        'validate_config',
-        # 性能监控模块
-        'PerformanceMonitor',
-        'clear_streamlit_cache',
-        # 异步处理模块
-        'task_manager',
-        'create_progress_ui',
-        'async_computation',
-        # 错误处理模块
-        'with_error_handling',
-        'create_error_recovery_ui',
-        'RetryConfig',
-        # 内存优化模块
-        'create_memory_monitor_ui',
-        'optimize_for_memory',
-        'MemoryMonitor',
-        # 高级UI模块
-        'create_advanced_header',
-        'create_status_dashboard',
-        'create_advanced_sidebar',
-        'create_advanced_progress_display',
-        'create_advanced_kpi_dashboard',
-        # 高级可视化模块
-        'create_3d_energy_flow_chart',
-        'create_animated_daily_profile',
-        'create_heatmap_analysis',
-        'create_radar_chart_comparison',
-        'create_waterfall_chart'
-    ]
+def __getattr__(name):
+    """按需导入子模块并返回其导出的属性 (PEP 562)"""
+    if name in _EXPORTS:
+        from importlib import import_module
+        module = import_module(f'.{_EXPORTS[name]}', __name__)
+        attr = getattr(module, name)
+        globals()[name] = attr  # 缓存，后续访问不再走__getattr__
+        return attr
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-except ImportError as e:
-    # 如果某些模块还未创建，不影响包的导入
-    print(f"Warning: Some modules are not yet available: {e}")
-    __all__ = []
 
 # 包的元信息
 __package_info__ = {
@@ -130,7 +121,7 @@ __package_info__ = {
 def get_package_info():
     """
     获取包的详细信息
-    
+
     返回:
     - dict: 包含包信息的字典
     """
@@ -139,7 +130,7 @@ def get_package_info():
 def list_available_functions():
     """
     列出包中所有可用的函数
-    
+
     返回:
     - list: 可用函数名称列表
     """
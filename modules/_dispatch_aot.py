@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+调度核心循环AOT预编译脚本
+
+运行 `python -m modules._dispatch_aot` 将_dispatch_loop提前编译为
+本地扩展模块 (modules/dispatch_aot.*.so / .pyd)。simulation_engine
+启动时优先加载该预编译产物，不存在时自动回退到numba JIT路径。
+
+在CI/部署流程中执行一次并随应用分发编译产物，即可彻底消除
+生产环境Streamlit首次运行模拟时的JIT编译停顿。
+"""
+
+import os
+
+from numba.pycc import CC
+
+from .simulation_engine import _dispatch_loop, _DISPATCH_SIGNATURE
+
+cc = CC('dispatch_aot')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+cc.export('dispatch', _DISPATCH_SIGNATURE)(_dispatch_loop)
+
+if __name__ == '__main__':
+    cc.compile()
@@ -4,17 +4,39 @@
 包含高级样式、动画效果、响应式设计等
 """
 
+import functools
+from types import MappingProxyType
+
 import streamlit as st
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
-import pandas as pd
 import numpy as np
 from .config import get_config, WIND_TURBINE_DATABASE
 
-def inject_custom_css():
-    """注入自定义CSS样式"""
-    st.markdown("""
+# plotly/pandas仅在预览图与KPI表格路径中使用，函数内按需导入，
+# 不让冷启动与纯配置交互的会话承担数百毫秒的导入开销
+
+# 侧边栏每次rerun（任意控件交互）都会重建，静态配置查询与选项列表
+# 在模块导入时取好，不再逐次查字典/重新分配列表
+_GEO_CONFIG = get_config("geography")
+_ECON_CONFIG = get_config("economics")
+_LOAD_TYPE_OPTIONS = list(get_config("load_profiles").keys())
+_WIND_TURBINE_OPTIONS = list(WIND_TURBINE_DATABASE.keys())
+# 风机选项展示标签：固定集合，导入时一次性格式化，
+# 选择框用__getitem__直接查表，免去每次渲染逐项执行lambda
+_WIND_TURBINE_LABELS = {
+    model: f"{model} ({info['rated_power']}kW)"
+    for model, info in WIND_TURBINE_DATABASE.items()
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _available_years(today_ordinal):
+    """可选的气象数据年份（按当天日期缓存，跨日自动失效）"""
+    current_year = datetime.fromordinal(today_ordinal).year
+    return tuple(range(current_year - 3, current_year))
+
+# 自定义CSS样式表：模块级常量，避免每次rerun重新构造约4KB的字符串字面量
+_CUSTOM_CSS = """
     <style>
     /* 全局样式优化 */
     .main .block-container {
@@ -174,110 +196,36 @@ def inject_custom_css():
         }
     }
     </style>
-    """, unsafe_allow_html=True)
+    """
 
-def create_advanced_header():
-    """创建高级页面头部"""
-    inject_custom_css()
-    
-    # 主标题
-    st.markdown("""
+
+def inject_custom_css():
+    """注入自定义CSS样式
+
+    每次rerun都需重新发出<style>块（Streamlit会移除未重绘的元素），
+    但复用模块级常量字符串，序列化端零构造开销。
+    """
+    st.markdown(_CUSTOM_CSS, unsafe_allow_html=True)
+
+# 页面头部：主标题+副标题为纯静态内容，合并为一条markdown
+_PAGE_HEADER_HTML = """
     <div class="main-title fade-in-up">
         ⚡ 智能微电网规划分析平台
     </div>
-    """, unsafe_allow_html=True)
-    
-    # 副标题和描述
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        st.markdown("""
-        <div style="text-align: center; color: #6c757d; font-size: 1.1rem; margin-bottom: 2rem;">
-            基于AI驱动的矿区可再生能源与储能系统优化设计平台<br>
-            <span style="color: #28a745;">🌱 绿色能源</span> • 
-            <span style="color: #007bff;">🔋 智能储能</span> • 
-            <span style="color: #ffc107;">📊 数据驱动</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-def create_status_dashboard():
-    """创建状态仪表板"""
-    st.markdown('<div class="sub-title">📊 系统状态总览</div>', unsafe_allow_html=True)
-    
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                <span class="status-indicator status-success"></span>
-                <strong>系统状态</strong>
-            </div>
-            <div style="font-size: 1.5rem; color: #28a745; font-weight: 600;">运行正常</div>
-            <div style="color: #6c757d; font-size: 0.9rem;">所有模块正常运行</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                <span class="status-indicator status-info"></span>
-                <strong>计算引擎</strong>
-            </div>
-            <div style="font-size: 1.5rem; color: #17a2b8; font-weight: 600;">就绪</div>
-            <div style="color: #6c757d; font-size: 0.9rem;">8760小时精确建模</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card">
-            <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                <span class="status-indicator status-success"></span>
-                <strong>数据连接</strong>
-            </div>
-            <div style="font-size: 1.5rem; color: #28a745; font-weight: 600;">已连接</div>
-            <div style="color: #6c757d; font-size: 0.9rem;">气象数据API正常</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        # 获取实际内存使用情况
-        try:
-            from .memory_optimizer import MemoryMonitor
-            monitor = MemoryMonitor()
-            stats = monitor.get_memory_stats()
-            memory_status = "正常" if stats.percent_used < 80 else "警告"
-            memory_color = "#28a745" if stats.percent_used < 80 else "#ffc107"
-            status_class = "status-success" if stats.percent_used < 80 else "status-warning"
-        except:
-            memory_status = "未知"
-            memory_color = "#6c757d"
-            status_class = "status-info"
-        
-        st.markdown(f"""
-        <div class="metric-card">
-            <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                <span class="status-indicator {status_class}"></span>
-                <strong>内存状态</strong>
-            </div>
-            <div style="font-size: 1.5rem; color: {memory_color}; font-weight: 600;">{memory_status}</div>
-            <div style="color: #6c757d; font-size: 0.9rem;">系统资源监控</div>
-        </div>
-        """, unsafe_allow_html=True)
+    <div style="text-align: center; color: #6c757d; font-size: 1.1rem; margin-bottom: 2rem;">
+        基于AI驱动的矿区可再生能源与储能系统优化设计平台<br>
+        <span style="color: #28a745;">🌱 绿色能源</span> •
+        <span style="color: #007bff;">🔋 智能储能</span> •
+        <span style="color: #ffc107;">📊 数据驱动</span>
+    </div>
+    """
 
-def create_advanced_sidebar():
-    """创建高级侧边栏"""
-    # 侧边栏标题
-    st.sidebar.markdown("""
+# 侧边栏标题与配置向导面板（静态内容，单次markdown发出）
+_SIDEBAR_HEADER_HTML = """
     <div style="text-align: center; padding: 1rem 0; color: white;">
         <h2 style="margin: 0; color: white;">🎛️ 智能配置面板</h2>
         <p style="margin: 0.5rem 0 0 0; opacity: 0.8;">专业级参数配置</p>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # 配置向导
-    st.sidebar.markdown("""
     <div class="sidebar-section">
         <h4 style="color: white; margin-bottom: 1rem;">📋 配置向导</h4>
         <div style="color: rgba(255,255,255,0.8); font-size: 0.9rem;">
@@ -288,149 +236,234 @@ def create_advanced_sidebar():
             ✅ 4. 经济参数设置
         </div>
     </div>
-    """, unsafe_allow_html=True)
-    
-    # 地理位置与负荷配置
-    with st.sidebar.expander("🌍 地理位置与负荷", expanded=True):
-        geo_config = get_config("geography")
+    """
+
+
+def create_advanced_header():
+    """创建高级页面头部"""
+    inject_custom_css()
+    st.markdown(_PAGE_HEADER_HTML, unsafe_allow_html=True)
+
+# 状态卡片HTML模板（chunk内插：指示器class、数值颜色、数值文本、说明文本）
+_STATUS_CARD_TEMPLATE = """
+        <div class="metric-card">
+            <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+                <span class="status-indicator {status_class}"></span>
+                <strong>{title}</strong>
+            </div>
+            <div style="font-size: 1.5rem; color: {color}; font-weight: 600;">{value}</div>
+            <div style="color: #6c757d; font-size: 0.9rem;">{description}</div>
+        </div>"""
+
+# 前三张卡片内容固定，预先渲染为常量HTML
+_STATIC_STATUS_CARDS = "".join([
+    _STATUS_CARD_TEMPLATE.format(
+        status_class="status-success", title="系统状态",
+        color="#28a745", value="运行正常", description="所有模块正常运行"
+    ),
+    _STATUS_CARD_TEMPLATE.format(
+        status_class="status-info", title="计算引擎",
+        color="#17a2b8", value="就绪", description="8760小时精确建模"
+    ),
+    _STATUS_CARD_TEMPLATE.format(
+        status_class="status-success", title="数据连接",
+        color="#28a745", value="已连接", description="气象数据API正常"
+    ),
+])
+
+
+@st.cache_resource
+def _memory_monitor():
+    """进程级单例的内存监控器（免去每次rerun重新实例化）"""
+    from .memory_optimizer import MemoryMonitor
+    return MemoryMonitor()
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def _memory_percent_used():
+    """当前内存占用百分比（2秒TTL，避免每次rerun都查询psutil）"""
+    return _memory_monitor().get_memory_stats().percent_used
+
+
+def create_status_dashboard():
+    """创建状态仪表板
+
+    四张卡片合并为一个grid容器、单次st.markdown发出，
+    减少前端protobuf消息数与React重绘次数。
+    """
+    # 获取实际内存使用情况（唯一的动态卡片）
+    try:
+        percent_used = _memory_percent_used()
+        memory_status = "正常" if percent_used < 80 else "警告"
+        memory_color = "#28a745" if percent_used < 80 else "#ffc107"
+        status_class = "status-success" if percent_used < 80 else "status-warning"
+    except:
+        memory_status = "未知"
+        memory_color = "#6c757d"
+        status_class = "status-info"
+
+    memory_card = _STATUS_CARD_TEMPLATE.format(
+        status_class=status_class, title="内存状态",
+        color=memory_color, value=memory_status, description="系统资源监控"
+    )
+
+    st.markdown(
+        '<div class="sub-title">📊 系统状态总览</div>'
+        '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">'
+        f'{_STATIC_STATUS_CARDS}{memory_card}'
+        '</div>',
+        unsafe_allow_html=True
+    )
+
+def create_advanced_sidebar():
+    """创建高级侧边栏"""
+    # 侧边栏标题 + 配置向导：静态HTML拼为一条st.markdown发出
+    st.sidebar.markdown(_SIDEBAR_HEADER_HTML, unsafe_allow_html=True)
+    
+    # 所有输入控件包在一个form里：参数修改只在点击提交后才触发rerun，
+    # 避免每次击键/点选都重新执行整个脚本（CSS注入、预览图、校验等）
+    with st.sidebar.form("config_form", clear_on_submit=False):
+        # 地理位置与负荷配置
+        with st.expander("🌍 地理位置与负荷", expanded=True):
+            geo_config = _GEO_CONFIG
+
+            col1, col2 = st.columns(2)
+            with col1:
+                longitude = st.number_input(
+                    "经度 (°)",
+                    min_value=-180.0,
+                    max_value=180.0,
+                    value=geo_config["default_longitude"],
+                    step=0.01,
+                    format="%.2f"
+                )
         
-        col1, col2 = st.columns(2)
-        with col1:
-            longitude = st.number_input(
-                "经度 (°)",
-                min_value=-180.0,
-                max_value=180.0,
-                value=geo_config["default_longitude"],
-                step=0.01,
-                format="%.2f"
-            )
+            with col2:
+                latitude = st.number_input(
+                    "纬度 (°)",
+                    min_value=-90.0,
+                    max_value=90.0,
+                    value=geo_config["default_latitude"],
+                    step=0.01,
+                    format="%.2f"
+                )
         
-        with col2:
-            latitude = st.number_input(
-                "纬度 (°)",
-                min_value=-90.0,
-                max_value=90.0,
-                value=geo_config["default_latitude"],
-                step=0.01,
-                format="%.2f"
-            )
+            # 地图预览
+            if st.checkbox("📍 显示位置预览"):
+                create_location_preview(latitude, longitude)
         
-        # 地图预览
-        if st.checkbox("📍 显示位置预览"):
-            create_location_preview(latitude, longitude)
-        
-        load_type = st.selectbox(
-            "负荷类型",
-            options=list(get_config("load_profiles").keys()),
-            help="选择矿区的用电模式"
-        )
+            load_type = st.selectbox(
+                "负荷类型",
+                options=_LOAD_TYPE_OPTIONS,
+                help="选择矿区的用电模式"
+            )
         
-        annual_consumption = st.number_input(
-            "年用电量 (GWh)",
-            min_value=1.0,
-            max_value=1000.0,
-            value=100.0,
-            step=1.0,
-            format="%.1f"
-        )
+            annual_consumption = st.number_input(
+                "年用电量 (GWh)",
+                min_value=1.0,
+                max_value=1000.0,
+                value=100.0,
+                step=1.0,
+                format="%.1f"
+            )
         
-        # 年份选择
-        current_year = datetime.now().year
-        available_years = list(range(current_year-3, current_year))
-        analysis_year = st.selectbox(
-            "气象数据年份",
-            options=available_years,
-            index=len(available_years)-1
-        )
+            # 年份选择
+            available_years = _available_years(datetime.now().toordinal())
+            analysis_year = st.selectbox(
+                "气象数据年份",
+                options=available_years,
+                index=len(available_years)-1
+            )
     
-    # 可再生能源配置
-    with st.sidebar.expander("🌞 可再生能源配置", expanded=True):
-        pv_capacity = st.number_input(
-            "光伏装机容量 (MW)",
-            min_value=0.0,
-            max_value=500.0,
-            value=50.0,
-            step=1.0
-        )
+        # 可再生能源配置
+        with st.expander("🌞 可再生能源配置", expanded=True):
+            pv_capacity = st.number_input(
+                "光伏装机容量 (MW)",
+                min_value=0.0,
+                max_value=500.0,
+                value=50.0,
+                step=1.0
+            )
         
-        # 风机配置
-        wind_turbine_options = list(WIND_TURBINE_DATABASE.keys())
-        wind_turbine_model = st.selectbox(
-            "风机型号",
-            options=wind_turbine_options,
-            format_func=lambda x: f"{x} ({WIND_TURBINE_DATABASE[x]['rated_power']}kW)"
-        )
+            # 风机配置
+            wind_turbine_model = st.selectbox(
+                "风机型号",
+                options=_WIND_TURBINE_OPTIONS,
+                format_func=_WIND_TURBINE_LABELS.__getitem__
+            )
         
-        wind_turbine_count = st.number_input(
-            "风机数量 (台)",
-            min_value=0,
-            max_value=100,
-            value=10,
-            step=1
-        )
+            wind_turbine_count = st.number_input(
+                "风机数量 (台)",
+                min_value=0,
+                max_value=100,
+                value=10,
+                step=1
+            )
         
-        # 可再生能源预览
-        create_renewable_preview(pv_capacity, wind_turbine_count, wind_turbine_model)
-    
-    # 储能系统配置
-    with st.sidebar.expander("🔋 储能系统配置", expanded=True):
-        battery_capacity = st.number_input(
-            "储能容量 (MWh)",
-            min_value=0.0,
-            max_value=1000.0,
-            value=100.0,
-            step=1.0
-        )
+            # 可再生能源预览
+            create_renewable_preview(pv_capacity, wind_turbine_count, wind_turbine_model)
+    
+        # 储能系统配置
+        with st.expander("🔋 储能系统配置", expanded=True):
+            battery_capacity = st.number_input(
+                "储能容量 (MWh)",
+                min_value=0.0,
+                max_value=1000.0,
+                value=100.0,
+                step=1.0
+            )
         
-        battery_power = st.number_input(
-            "储能功率 (MW)",
-            min_value=0.0,
-            max_value=500.0,
-            value=50.0,
-            step=1.0
-        )
+            battery_power = st.number_input(
+                "储能功率 (MW)",
+                min_value=0.0,
+                max_value=500.0,
+                value=50.0,
+                step=1.0
+            )
         
-        # C倍率计算和显示
-        if battery_capacity > 0:
-            c_rate = battery_power / battery_capacity
-            st.info(f"📊 C倍率: {c_rate:.2f}C")
+            # C倍率计算和显示
+            if battery_capacity > 0:
+                c_rate = battery_power / battery_capacity
+                st.info(f"📊 C倍率: {c_rate:.2f}C")
             
-            if c_rate > 1:
-                st.warning("⚠️ C倍率较高，注意电池寿命")
-            elif c_rate < 0.5:
-                st.success("✅ C倍率适中，有利于电池寿命")
-    
-    # 经济参数配置
-    with st.sidebar.expander("💰 经济参数配置", expanded=True):
-        econ_config = get_config("economics")
+                if c_rate > 1:
+                    st.warning("⚠️ C倍率较高，注意电池寿命")
+                elif c_rate < 0.5:
+                    st.success("✅ C倍率适中，有利于电池寿命")
+    
+        # 经济参数配置
+        with st.expander("💰 经济参数配置", expanded=True):
+            econ_config = _ECON_CONFIG
+
+            col1, col2 = st.columns(2)
+            with col1:
+                grid_purchase_price = st.number_input(
+                    "购电价格 ($/kWh)",
+                    min_value=0.01,
+                    max_value=1.0,
+                    value=econ_config["default_purchase_price"],
+                    step=0.01,
+                    format="%.3f"
+                )
         
-        col1, col2 = st.columns(2)
-        with col1:
-            grid_purchase_price = st.number_input(
-                "购电价格 ($/kWh)",
-                min_value=0.01,
-                max_value=1.0,
-                value=econ_config["default_purchase_price"],
-                step=0.01,
-                format="%.3f"
-            )
+            with col2:
+                grid_sell_price = st.number_input(
+                    "售电价格 ($/kWh)",
+                    min_value=0.01,
+                    max_value=1.0,
+                    value=econ_config["default_sell_price"],
+                    step=0.01,
+                    format="%.3f"
+                )
         
-        with col2:
-            grid_sell_price = st.number_input(
-                "售电价格 ($/kWh)",
-                min_value=0.01,
-                max_value=1.0,
-                value=econ_config["default_sell_price"],
-                step=0.01,
-                format="%.3f"
-            )
-        
-        # 价差分析
-        price_diff = grid_purchase_price - grid_sell_price
-        st.info(f"📈 购售电价差: ${price_diff:.3f}/kWh")
-    
-    # 返回用户输入
-    return {
+            # 价差分析
+            price_diff = grid_purchase_price - grid_sell_price
+            st.info(f"📈 购售电价差: ${price_diff:.3f}/kWh")
+        st.form_submit_button("✅ 应用配置", use_container_width=True)
+
+    # 返回用户输入：配置未变化时复用session_state中缓存的同一dict对象，
+    # 下游以该dict为键的缓存可走对象恒等快速路径，避免逐键重算
+    user_inputs = {
         'latitude': latitude,
         'longitude': longitude,
         'annual_consumption': annual_consumption,
@@ -444,31 +477,75 @@ def create_advanced_sidebar():
         'load_type': load_type,
         'wind_turbine_model': wind_turbine_model
     }
+    inputs_key = hash(tuple(sorted(user_inputs.items())))
+    if st.session_state.get('_user_inputs_key') != inputs_key:
+        st.session_state['_user_inputs_key'] = inputs_key
+        st.session_state['_user_inputs'] = user_inputs
+    return st.session_state['_user_inputs']
+
+@functools.lru_cache(maxsize=1)
+def _plotly_go():
+    """按需导入plotly.graph_objects（导入成本只支付一次）"""
+    import plotly.graph_objects as go
+    return go
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _build_location_fig(latitude, longitude):
+    """按(纬度, 经度)缓存位置预览图的Figure描述字典"""
+    go = _plotly_go()
+    fig = go.Figure(go.Scattermapbox(
+        lat=[latitude],
+        lon=[longitude],
+        mode='markers',
+        marker=dict(size=15, color='red'),
+        text=[f"矿区位置<br>纬度: {latitude}°<br>经度: {longitude}°"],
+        hoverinfo='text'
+    ))
+
+    fig.update_layout(
+        mapbox=dict(
+            style="open-street-map",
+            center=dict(lat=latitude, lon=longitude),
+            zoom=8
+        ),
+        height=200,
+        margin=dict(l=0, r=0, t=0, b=0)
+    )
+
+    return fig.to_dict()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _build_renewable_fig(pv_capacity, wind_capacity):
+    """按(光伏容量, 风电容量)缓存配置预览饼图的Figure描述字典"""
+    go = _plotly_go()
+    total_capacity = pv_capacity + wind_capacity
+
+    fig = go.Figure(data=[go.Pie(
+        labels=['光伏发电', '风力发电'],
+        values=[pv_capacity, wind_capacity],
+        hole=0.4,
+        marker_colors=['#FFA500', '#87CEEB']
+    )])
+
+    fig.update_layout(
+        title=f"总装机容量: {total_capacity:.1f} MW",
+        height=200,
+        margin=dict(l=0, r=0, t=30, b=0),
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.1)
+    )
+
+    return fig.to_dict()
+
 
 def create_location_preview(latitude, longitude):
     """创建位置预览地图"""
     try:
-        # 创建简单的位置标记图
-        fig = go.Figure(go.Scattermapbox(
-            lat=[latitude],
-            lon=[longitude],
-            mode='markers',
-            marker=dict(size=15, color='red'),
-            text=[f"矿区位置<br>纬度: {latitude}°<br>经度: {longitude}°"],
-            hoverinfo='text'
-        ))
-
-        fig.update_layout(
-            mapbox=dict(
-                style="open-street-map",
-                center=dict(lat=latitude, lon=longitude),
-                zoom=8
-            ),
-            height=200,
-            margin=dict(l=0, r=0, t=0, b=0)
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        # 与经纬度输入框step=0.01对齐，保证缓存键稳定
+        fig_dict = _build_location_fig(round(latitude, 2), round(longitude, 2))
+        st.plotly_chart(_plotly_go().Figure(fig_dict), use_container_width=True)
     except Exception as e:
         st.info("📍 地图预览暂时不可用")
 
@@ -479,23 +556,8 @@ def create_renewable_preview(pv_capacity, wind_count, wind_model):
         wind_capacity = wind_count * wind_info['rated_power'] / 1000  # MW
         total_capacity = pv_capacity + wind_capacity
 
-        # 创建饼图
-        fig = go.Figure(data=[go.Pie(
-            labels=['光伏发电', '风力发电'],
-            values=[pv_capacity, wind_capacity],
-            hole=0.4,
-            marker_colors=['#FFA500', '#87CEEB']
-        )])
-
-        fig.update_layout(
-            title=f"总装机容量: {total_capacity:.1f} MW",
-            height=200,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=True,
-            legend=dict(orientation="h", yanchor="bottom", y=-0.1)
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        fig_dict = _build_renewable_fig(pv_capacity, wind_capacity)
+        st.plotly_chart(_plotly_go().Figure(fig_dict), use_container_width=True)
 
         # 显示详细信息
         st.markdown(f"""
@@ -508,22 +570,13 @@ def create_renewable_preview(pv_capacity, wind_count, wind_model):
     except Exception as e:
         st.info("📊 配置预览暂时不可用")
 
-def create_advanced_progress_display(task_id, title="计算进行中..."):
-    """创建高级进度显示"""
-    from .async_processor import task_manager
+def _compact_html(html):
+    """压缩HTML字面量的行首缩进（导入时执行一次，降低每次发送的字节数）"""
+    return "\n".join(line.strip() for line in html.strip().splitlines())
 
-    task = task_manager.get_task_status(task_id)
-
-    if not task:
-        st.error("❌ 任务不存在")
-        return None
 
-    # 创建进度容器
-    progress_container = st.container()
-
-    with progress_container:
-        if task.status.value == "pending":
-            st.markdown("""
+# 各任务状态的进度HTML：静态状态在导入时渲染为常量，动态状态保留模板
+_PENDING_PROGRESS_HTML = _compact_html("""
             <div class="progress-container">
                 <h4>⏳ 任务准备中...</h4>
                 <div style="display: flex; align-items: center;">
@@ -534,35 +587,9 @@ def create_advanced_progress_display(task_id, title="计算进行中..."):
                 </div>
                 <p style="margin-top: 0.5rem; color: #6c757d;">正在初始化计算环境...</p>
             </div>
-            """, unsafe_allow_html=True)
-
-        elif task.status.value == "running":
-            progress_percent = int(task.progress * 100)
+            """)
 
-            st.markdown(f"""
-            <div class="progress-container">
-                <h4>🔄 {title}</h4>
-                <div style="display: flex; align-items: center;">
-                    <div style="width: 100%; background: #e9ecef; border-radius: 10px; height: 12px;">
-                        <div style="width: {progress_percent}%; background: linear-gradient(90deg, #28a745, #20c997); height: 100%; border-radius: 10px; transition: width 0.3s ease;"></div>
-                    </div>
-                    <span style="margin-left: 1rem; font-weight: 600; font-size: 1.1rem;">{progress_percent}%</span>
-                </div>
-                <div style="margin-top: 1rem; display: flex; justify-content: space-between; align-items: center;">
-                    <p style="margin: 0; color: #6c757d;">正在执行复杂的能源系统建模计算...</p>
-                    <button onclick="cancelTask()" style="background: #dc3545; color: white; border: none; padding: 0.5rem 1rem; border-radius: 5px; cursor: pointer;">取消</button>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-            # 显示执行时间
-            if task.start_time:
-                from datetime import datetime
-                elapsed = (datetime.now() - task.start_time).total_seconds()
-                st.info(f"⏱️ 已运行: {elapsed:.1f} 秒")
-
-        elif task.status.value == "completed":
-            st.markdown("""
+_COMPLETED_PROGRESS_HTML = _compact_html("""
             <div class="progress-container" style="border-left-color: #28a745;">
                 <h4>✅ 计算完成！</h4>
                 <div style="display: flex; align-items: center;">
@@ -573,148 +600,218 @@ def create_advanced_progress_display(task_id, title="计算进行中..."):
                 </div>
                 <p style="margin-top: 0.5rem; color: #28a745;">所有计算已成功完成，正在生成分析报告...</p>
             </div>
-            """, unsafe_allow_html=True)
+            """)
 
-            if task.execution_time:
-                st.success(f"🎉 总执行时间: {task.execution_time:.2f} 秒")
-
-            return task
-
-        elif task.status.value == "failed":
-            st.markdown(f"""
+_FAILED_PROGRESS_TEMPLATE = """
             <div class="progress-container" style="border-left-color: #dc3545;">
                 <h4>❌ 计算失败</h4>
-                <p style="color: #dc3545; margin: 0.5rem 0;">错误信息: {task.error}</p>
+                <p style="color: #dc3545; margin: 0.5rem 0;">错误信息: {error}</p>
                 <button onclick="retryTask()" style="background: #007bff; color: white; border: none; padding: 0.5rem 1rem; border-radius: 5px; cursor: pointer; margin-top: 0.5rem;">重试</button>
             </div>
-            """, unsafe_allow_html=True)
-
-            return task
+            """
 
-        elif task.status.value == "cancelled":
-            st.markdown("""
+_CANCELLED_PROGRESS_HTML = _compact_html("""
             <div class="progress-container" style="border-left-color: #ffc107;">
                 <h4>⚠️ 任务已取消</h4>
                 <p style="color: #856404; margin: 0.5rem 0;">用户主动取消了计算任务</p>
             </div>
-            """, unsafe_allow_html=True)
+            """)
+
+
+def _render_pending_progress(task, title):
+    st.markdown(_PENDING_PROGRESS_HTML, unsafe_allow_html=True)
+
+
+def _render_running_progress(task, title):
+    # 原生st.progress发送紧凑的Progress消息，前端增量diff更新，
+    # 比每秒重发并重解析一大段自定义HTML进度条便宜得多
+    progress_percent = int(task.progress * 100)
+    st.progress(min(task.progress, 1.0), text=f"🔄 {title} — {progress_percent}%")
+    st.caption("正在执行复杂的能源系统建模计算...")
+
+    # 显示执行时间
+    if task.start_time:
+        elapsed = (datetime.now() - task.start_time).total_seconds()
+        st.info(f"⏱️ 已运行: {elapsed:.1f} 秒")
+
+
+def _render_completed_progress(task, title):
+    st.markdown(_COMPLETED_PROGRESS_HTML, unsafe_allow_html=True)
+
+    if task.execution_time:
+        st.success(f"🎉 总执行时间: {task.execution_time:.2f} 秒")
+
+
+def _render_failed_progress(task, title):
+    st.markdown(
+        _FAILED_PROGRESS_TEMPLATE.format(error=task.error),
+        unsafe_allow_html=True
+    )
+
+
+def _render_cancelled_progress(task, title):
+    st.markdown(_CANCELLED_PROGRESS_HTML, unsafe_allow_html=True)
 
-            return task
 
-    # 自动刷新
-    if task.status.value in ["pending", "running"]:
-        import time
-        time.sleep(1)
-        st.rerun()
+# 状态 -> 渲染函数的O(1)分发表（代替五连elif）
+_PROGRESS_RENDERERS = {
+    "pending": _render_pending_progress,
+    "running": _render_running_progress,
+    "completed": _render_completed_progress,
+    "failed": _render_failed_progress,
+    "cancelled": _render_cancelled_progress,
+}
 
-    return None
+# 任务已结束的状态：渲染后将task返回给调用方处理结果
+_TERMINAL_TASK_STATUSES = frozenset({"completed", "failed", "cancelled"})
+
+
+def create_advanced_progress_display(task_id, title="计算进行中..."):
+    """创建高级进度显示
+
+    本函数只负责渲染当前任务状态，不做任何阻塞等待或rerun：
+    轮询刷新由调用方的@st.fragment(run_every=...)片段驱动，
+    每秒只重绘进度区域而非整个页面。
+    """
+    from .async_processor import task_manager
+
+    task = task_manager.get_task_status(task_id)
+
+    if not task:
+        st.error("❌ 任务不存在")
+        return None
+
+    status = task.status.value
+    renderer = _PROGRESS_RENDERERS.get(status)
+
+    if renderer is not None:
+        with st.container():
+            renderer(task, title)
+
+    # pending/running状态由调用方片段按周期重绘
+    return task if status in _TERMINAL_TASK_STATUSES else None
 
 def create_advanced_kpi_dashboard(simulation_results, economic_params):
     """创建高级KPI仪表板"""
     st.markdown('<div class="sub-title">📊 关键绩效指标</div>', unsafe_allow_html=True)
 
     try:
-        # 计算KPI
-        total_load = simulation_results['mine_load_kw'].sum() / 1000  # MWh
-        renewable_generation = simulation_results['renewable_total_kw'].sum() / 1000  # MWh
-        grid_purchase = simulation_results['grid_buy_kw'].sum() / 1000  # MWh
-        grid_sell = simulation_results['grid_sell_kw'].sum() / 1000  # MWh
+        # 计算KPI：六列年度汇总在同一float32块上做单次reduce，
+        # 一趟内存扫描代替六次独立的逐列.sum()
+        kpi_columns = [
+            'mine_load_kw', 'renewable_total_kw',
+            'grid_buy_kw', 'grid_sell_kw',
+            'grid_cost_usd', 'grid_revenue_usd'
+        ]
+        block = simulation_results[kpi_columns].to_numpy()
+        if block.dtype != np.float32:
+            # 仿真引擎输出即为float32单块（零拷贝视图）；
+            # 外部传入的混合dtype结果在此统一降为float32再做聚合
+            block = np.ascontiguousarray(block, dtype=np.float32)
+        totals = block.sum(axis=0, dtype=np.float64)
+        total_load, renewable_generation, grid_purchase, grid_sell = totals[:4] / 1000  # MWh
+        total_cost, total_revenue = totals[4:]
 
         renewable_penetration = (renewable_generation / total_load) * 100
         self_consumption = ((renewable_generation - grid_sell) / renewable_generation) * 100 if renewable_generation > 0 else 0
         grid_independence = ((total_load - grid_purchase) / total_load) * 100
 
         # 经济指标
-        total_cost = simulation_results['grid_cost_usd'].sum()
-        total_revenue = simulation_results['grid_revenue_usd'].sum()
         net_cost = total_cost - total_revenue
 
-        # 创建KPI卡片
-        col1, col2, col3, col4 = st.columns(4)
+        # 展示字符串统一在此格式化一次，卡片拼接只引用现成的局部变量
+        s_penetration = f"{renewable_penetration:.1f}%"
+        s_self = f"{self_consumption:.1f}%"
+        s_independence = f"{grid_independence:.1f}%"
+        s_net_cost = f"${net_cost:,.0f}"
+        s_renewable_mwh = f"{renewable_generation:.1f} MWh"
 
-        with col1:
-            create_kpi_card(
+        # 创建KPI卡片：四张卡片拼为一个grid容器，单次st.markdown发出
+        cards_html = "".join([
+            _kpi_card_html(
                 "可再生能源渗透率",
-                f"{renewable_penetration:.1f}%",
+                s_penetration,
                 "success" if renewable_penetration > 50 else "warning",
                 "🌱",
-                f"年发电量: {renewable_generation:.1f} MWh"
-            )
-
-        with col2:
-            create_kpi_card(
+                f"年发电量: {s_renewable_mwh}"
+            ),
+            _kpi_card_html(
                 "自消纳率",
-                f"{self_consumption:.1f}%",
+                s_self,
                 "success" if self_consumption > 70 else "info",
                 "🔄",
-                f"自用电量占比"
-            )
-
-        with col3:
-            create_kpi_card(
+                "自用电量占比"
+            ),
+            _kpi_card_html(
                 "电网独立度",
-                f"{grid_independence:.1f}%",
+                s_independence,
                 "success" if grid_independence > 60 else "warning",
                 "🔌",
-                f"减少电网依赖"
-            )
-
-        with col4:
-            create_kpi_card(
+                "减少电网依赖"
+            ),
+            _kpi_card_html(
                 "年度净成本",
-                f"${net_cost:,.0f}",
+                s_net_cost,
                 "success" if net_cost < 0 else "error",
                 "💰",
-                f"成本-收益分析"
-            )
+                "成本-收益分析"
+            ),
+        ])
+        st.markdown(
+            '<div style="display: grid; grid-template-columns: repeat(4, 1fr); gap: 1rem;">'
+            f'{cards_html}</div>',
+            unsafe_allow_html=True
+        )
 
-        # 详细KPI表格
+        # 详细KPI表格（按六个数值总量缓存，重复渲染跳过格式化）
         st.markdown('<div class="sub-title">📋 详细指标分析</div>', unsafe_allow_html=True)
 
-        kpi_data = {
-            "指标类别": ["能源", "能源", "能源", "经济", "经济", "经济", "环境"],
-            "指标名称": [
-                "年总用电量", "可再生能源发电量", "电网购电量",
-                "年度电费支出", "年度售电收入", "年度净成本", "CO₂减排量"
-            ],
-            "数值": [
-                f"{total_load:.1f} MWh",
-                f"{renewable_generation:.1f} MWh",
-                f"{grid_purchase:.1f} MWh",
-                f"${total_cost:,.0f}",
-                f"${total_revenue:,.0f}",
-                f"${net_cost:,.0f}",
-                f"{renewable_generation * 0.58:.1f} 吨"
-            ],
-            "占比/状态": [
-                "100%",
-                f"{renewable_penetration:.1f}%",
-                f"{(grid_purchase/total_load)*100:.1f}%",
-                "-",
-                "-",
-                "盈利" if net_cost < 0 else "亏损",
-                f"减排 {(renewable_generation * 0.58):.0f} 吨CO₂"
-            ]
-        }
-
-        kpi_df = pd.DataFrame(kpi_data)
+        kpi_df = _build_kpi_table(
+            float(total_load), float(renewable_generation), float(grid_purchase),
+            float(total_cost), float(total_revenue), float(net_cost)
+        )
         st.dataframe(kpi_df, use_container_width=True, hide_index=True)
 
     except Exception as e:
         st.error(f"KPI计算失败: {e}")
 
-def create_kpi_card(title, value, status, icon, description):
-    """创建KPI卡片"""
-    status_colors = {
-        "success": "#28a745",
-        "warning": "#ffc107",
-        "error": "#dc3545",
-        "info": "#17a2b8"
-    }
-
-    color = status_colors.get(status, "#6c757d")
-
-    st.markdown(f"""
+@st.cache_data(max_entries=16, show_spinner=False)
+def _build_kpi_table(total_load, renewable_generation, grid_purchase,
+                     total_cost, total_revenue, net_cost):
+    """按六个年度总量构建详细KPI表格（from_records免去dict->列的转置）"""
+    import pandas as pd
+
+    renewable_penetration = (renewable_generation / total_load) * 100 if total_load > 0 else 0
+    co2_reduction = renewable_generation * 0.58
+
+    rows = [
+        ("能源", "年总用电量", f"{total_load:.1f} MWh", "100%"),
+        ("能源", "可再生能源发电量", f"{renewable_generation:.1f} MWh",
+         f"{renewable_penetration:.1f}%"),
+        ("能源", "电网购电量", f"{grid_purchase:.1f} MWh",
+         f"{(grid_purchase / total_load) * 100:.1f}%" if total_load > 0 else "-"),
+        ("经济", "年度电费支出", f"${total_cost:,.0f}", "-"),
+        ("经济", "年度售电收入", f"${total_revenue:,.0f}", "-"),
+        ("经济", "年度净成本", f"${net_cost:,.0f}",
+         "盈利" if net_cost < 0 else "亏损"),
+        ("环境", "CO₂减排量", f"{co2_reduction:.1f} 吨",
+         f"减排 {co2_reduction:.0f} 吨CO₂"),
+    ]
+    return pd.DataFrame.from_records(
+        rows, columns=("指标类别", "指标名称", "数值", "占比/状态")
+    )
+
+
+# 状态 -> 颜色映射：只读常量（MappingProxyType防止被调用方意外修改）
+_KPI_STATUS_COLORS = MappingProxyType({
+    "success": "#28a745",
+    "warning": "#ffc107",
+    "error": "#dc3545",
+    "info": "#17a2b8"
+})
+
+# KPI卡片HTML模板：CSS骨架在导入时构造一次，每次调用只做变量槽替换
+_KPI_CARD_TEMPLATE = """
     <div class="metric-card">
         <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 0.5rem;">
             <span style="font-size: 2rem;">{icon}</span>
@@ -723,5 +820,19 @@ def create_kpi_card(title, value, status, icon, description):
         <h4 style="margin: 0; color: #2c3e50; font-size: 0.9rem;">{title}</h4>
         <div style="font-size: 2rem; font-weight: 700; color: {color}; margin: 0.5rem 0;">{value}</div>
         <p style="margin: 0; color: #6c757d; font-size: 0.8rem;">{description}</p>
-    </div>
-    """, unsafe_allow_html=True)
+    </div>"""
+
+
+def _kpi_card_html(title, value, status, icon, description):
+    """构建单张KPI卡片的HTML片段（不直接渲染，供调用方批量拼接）"""
+    return _KPI_CARD_TEMPLATE.format(
+        icon=icon, status=status, title=title,
+        color=_KPI_STATUS_COLORS.get(status, "#6c757d"),
+        value=value, description=description
+    )
+
+
+def create_kpi_card(title, value, status, icon, description):
+    """创建KPI卡片"""
+    st.markdown(_kpi_card_html(title, value, status, icon, description),
+                unsafe_allow_html=True)
@@ -4,14 +4,40 @@
 包含3D图表、动画效果、高级交互等
 """
 
+import functools
+import hashlib
+
 import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
+import plotly.io as pio
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# 图表JSON序列化使用orjson引擎：对含8760点数组的Figure比标准json快3-10倍，
+# st.plotly_chart传输前的序列化是结果页的热路径。orjson未安装时保持默认引擎
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = 'orjson'
+except ImportError:
+    pass
+
+
+def _hash_dataframe(df):
+    """按内容哈希DataFrame，作为st.cache_data的缓存键"""
+    return hashlib.md5(pd.util.hash_pandas_object(df, index=True).values).hexdigest()
+
+
+# 图表构建函数的缓存配置：模拟结果不变时直接复用已生成的Figure；
+# max_entries限制每个图表最多缓存8份结果，防止多次仿真后缓存无界增长
+_FIGURE_CACHE_KWARGS = dict(
+    show_spinner=False,
+    max_entries=8,
+    hash_funcs={pd.DataFrame: _hash_dataframe}
+)
+
 def validate_and_fix_data(simulation_results):
     """验证和修复模拟结果数据字段"""
     try:
@@ -23,86 +49,183 @@ def validate_and_fix_data(simulation_results):
             'grid_cost_usd', 'grid_revenue_usd'
         ]
 
-        # 添加缺失字段的默认值
-        for field in required_fields:
-            if field not in simulation_results.columns:
-                if 'battery' in field:
-                    simulation_results[field] = 0.0
-                elif 'grid' in field and 'cost' in field:
-                    simulation_results[field] = 0.0
-                elif 'grid' in field and 'revenue' in field:
-                    simulation_results[field] = 0.0
-                else:
-                    simulation_results[field] = 0.0
-                st.warning(f"添加缺失字段 {field}，使用默认值")
+        # 添加缺失字段的默认值：一次性批量插入，避免逐列插入反复
+        # 触发DataFrame内部块重建；告警也聚合为一条
+        missing = [f for f in required_fields if f not in simulation_results.columns]
+        if missing:
+            simulation_results[missing] = 0.0
+            st.warning(f"添加缺失字段，使用默认值: {', '.join(missing)}")
 
         # 计算组合字段
         if 'battery_power_kw' not in simulation_results.columns:
-            # 计算净电池功率（充电为负，放电为正）
+            # 计算净电池功率（充电为负，放电为正）；
+            # 在ndarray上直接相减，跳过索引对齐
             simulation_results['battery_power_kw'] = (
-                simulation_results['battery_discharge_kw'] -
-                simulation_results['battery_charge_kw']
+                simulation_results['battery_discharge_kw'].to_numpy() -
+                simulation_results['battery_charge_kw'].to_numpy()
+            )
+
+        # 统一降为float32：仿真引擎的输出本就是float32单块，这里只兜底
+        # 外部传入的float64结果，后续聚合/reshape的内存带宽和payload减半
+        float64_cols = simulation_results.select_dtypes('float64').columns
+        if len(float64_cols):
+            simulation_results[float64_cols] = (
+                simulation_results[float64_cols].astype(np.float32)
             )
 
+        # 打上验证标记：同一DataFrame流经多个图表函数时只做一次全量检查
+        simulation_results.attrs['_validated'] = True
         return simulation_results
 
     except Exception as e:
         st.error(f"数据验证失败: {e}")
         return simulation_results
 
-def create_3d_energy_flow_chart(simulation_results):
+
+def _ensure_validated(simulation_results):
+    """带标记短路的验证入口：已验证过的DataFrame直接返回"""
+    if simulation_results.attrs.get('_validated'):
+        return simulation_results
+    return validate_and_fix_data(simulation_results)
+
+def compute_daily_averages(simulation_results, columns=None):
+    """
+    将逐小时模拟结果降采样为逐日均值，供多个图表复用
+
+    8760个点直接传给Plotly会产生很大的JSON负载；预先聚合为365个
+    日均值后，各图表共享同一份降采样结果，序列化和渲染时间成比例下降。
+
+    参数:
+    - simulation_results: pandas.DataFrame, 逐小时模拟结果
+    - columns: list, 需要聚合的列，默认为负荷/光伏/风电功率列
+
+    返回:
+    - pandas.DataFrame: 逐日均值，行索引为天序号
+    """
+    if columns is None:
+        columns = ['mine_load_kw', 'solar_power_kw', 'wind_power_kw']
+
+    days = len(simulation_results) // 24
+    values = simulation_results[columns].to_numpy()[:days * 24]
+    daily = values.reshape(days, 24, len(columns)).mean(axis=1)
+
+    return pd.DataFrame(daily, columns=columns)
+
+
+# 单条3D轨迹的点数上限：超过后用LTTB降采样，限制图表JSON负载
+_MAX_3D_POINTS = 1000
+
+
+@functools.lru_cache(maxsize=8)
+def _daily_date_strings(days):
+    """按天数缓存已格式化的日期标签（重建图表时跳过N次strftime）"""
+    dates = pd.date_range('2023-01-01', periods=days, freq='D')
+    return dates.strftime('%Y-%m-%d').to_numpy()
+
+
+def _lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets降采样，返回保留点的索引
+
+    相比等步长抽样，LTTB按三角形面积挑选每个桶内最能保形的点，
+    峰谷不会被整桶跳过。x轴取等距序号，面积计算只依赖y值。
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    # 首尾固定保留，中间n_out-2个桶
+    bucket_edges = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        # 下一桶的平均点作为三角形第三个顶点
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+        avg_x = (end + next_end - 1) / 2.0
+        avg_y = y[end:next_end].mean()
+
+        xs = np.arange(start, end)
+        # 三角形面积（底边prev -> 桶内候选点 -> 下桶均值点）
+        areas = np.abs(
+            (prev - avg_x) * (y[start:end] - y[prev]) -
+            (prev - xs) * (avg_y - y[prev])
+        )
+        prev = start + int(np.argmax(areas))
+        indices[i + 1] = prev
+
+    return indices
+
+
+@st.cache_data(**_FIGURE_CACHE_KWARGS)
+def create_3d_energy_flow_chart(simulation_results, daily_averages=None):
     """创建3D能量流动图表"""
     try:
         # 验证和修复数据
-        simulation_results = validate_and_fix_data(simulation_results)
-        # 准备数据
-        hours = len(simulation_results)
-        time_range = pd.date_range(start='2023-01-01', periods=hours, freq='h')
-        
-        # 采样数据以提高性能（显示每天的数据）
-        sample_indices = range(0, hours, 24)  # 每天一个点
-        sampled_data = simulation_results.iloc[sample_indices].copy()
-        sampled_time = [time_range[i] for i in sample_indices]
-        
-        # 创建3D散点图
-        fig = go.Figure()
-        
-        # 添加光伏发电轨迹
-        fig.add_trace(go.Scatter3d(
-            x=list(range(len(sampled_data))),
-            y=sampled_data['solar_power_kw'],
-            z=sampled_data['mine_load_kw'],
-            mode='markers+lines',
-            marker=dict(
-                size=5,
-                color=sampled_data['solar_power_kw'],
-                colorscale='Viridis',
-                opacity=0.8
-            ),
-            line=dict(color='orange', width=3),
-            name='光伏发电轨迹',
-            text=[f"日期: {t.strftime('%Y-%m-%d')}<br>光伏: {s:.0f}kW<br>负荷: {l:.0f}kW" 
-                  for t, s, l in zip(sampled_time, sampled_data['solar_power_kw'], sampled_data['mine_load_kw'])],
-            hovertemplate='%{text}<extra></extra>'
-        ))
-        
-        # 添加风电轨迹
-        fig.add_trace(go.Scatter3d(
-            x=list(range(len(sampled_data))),
-            y=sampled_data['wind_power_kw'],
-            z=sampled_data['mine_load_kw'],
-            mode='markers+lines',
+        simulation_results = _ensure_validated(simulation_results)
+
+        # 降采样为逐日均值（可由调用方预计算后传入复用）
+        if daily_averages is None:
+            daily_averages = compute_daily_averages(simulation_results)
+        sampled_data = daily_averages
+        day_positions = np.arange(len(sampled_data))
+        if len(sampled_data) > _MAX_3D_POINTS:
+            # 多年模拟时逐日均值仍可能上千点：对光伏/风电序列分别做
+            # LTTB，取索引并集，两条轨迹共享同一套保留点
+            keep = np.union1d(
+                _lttb_indices(sampled_data['solar_power_kw'].to_numpy(), _MAX_3D_POINTS),
+                _lttb_indices(sampled_data['wind_power_kw'].to_numpy(), _MAX_3D_POINTS)
+            )
+            sampled_data = sampled_data.iloc[keep].reset_index(drop=True)
+            day_positions = keep
+        # 悬浮提示：功率值由hovertemplate直接引用坐标，不再为每个点
+        # 预拼完整字符串；日期标签按天数整表缓存，再按保留索引取子集
+        date_labels = _daily_date_strings(len(daily_averages))[day_positions]
+
+        # 点数较多时只画线：每个marker都是一个独立渲染对象，
+        # 超过500点后拖动/旋转明显卡顿
+        trace_mode = 'lines' if len(sampled_data) > 500 else 'markers+lines'
+
+        # 两条轨迹合并为单个Scatter3d：一次WebGL管线初始化，
+        # 系列由颜色通道区分，中间插入NaN断点防止光伏末尾连到风电开头
+        n = len(sampled_data)
+        day_axis = day_positions.astype(np.float32)
+        load = sampled_data['mine_load_kw'].to_numpy()
+        gap = np.float32(np.nan)
+
+        x = np.concatenate([day_axis, [gap], day_axis])
+        y = np.concatenate([
+            sampled_data['solar_power_kw'].to_numpy(), [gap],
+            sampled_data['wind_power_kw'].to_numpy()
+        ])
+        z = np.concatenate([load, [gap], load])
+        series_flag = np.concatenate([
+            np.zeros(n, np.float32), [gap], np.ones(n, np.float32)
+        ])
+        # customdata两列：日期标签 + 系列名，hovertemplate按列引用
+        customdata = np.stack([
+            np.concatenate([date_labels, ['-'], date_labels]),
+            np.concatenate([np.repeat('光伏', n), ['-'], np.repeat('风电', n)])
+        ], axis=1)
+
+        fig = go.Figure(go.Scatter3d(
+            x=x, y=y, z=z,
+            mode=trace_mode,
             marker=dict(
                 size=5,
-                color=sampled_data['wind_power_kw'],
-                colorscale='Blues',
+                color=series_flag,
+                colorscale=[[0, 'orange'], [1, 'skyblue']],
                 opacity=0.8
             ),
-            line=dict(color='skyblue', width=3),
-            name='风电轨迹',
-            text=[f"日期: {t.strftime('%Y-%m-%d')}<br>风电: {w:.0f}kW<br>负荷: {l:.0f}kW" 
-                  for t, w, l in zip(sampled_time, sampled_data['wind_power_kw'], sampled_data['mine_load_kw'])],
-            hovertemplate='%{text}<extra></extra>'
+            line=dict(color='gray', width=3),
+            name='能量流动轨迹',
+            customdata=customdata,
+            hovertemplate=('日期: %{customdata[0]}<br>'
+                           '%{customdata[1]}: %{y:.0f}kW<br>'
+                           '负荷: %{z:.0f}kW<extra></extra>')
         ))
         
         fig.update_layout(
@@ -123,164 +246,78 @@ def create_3d_energy_flow_chart(simulation_results):
         st.error(f"3D图表创建失败: {e}")
         return None
 
+@st.cache_data(**_FIGURE_CACHE_KWARGS)
 def create_animated_daily_profile(simulation_results):
     """创建动画日负荷曲线"""
     try:
         # 验证和修复数据
-        simulation_results = validate_and_fix_data(simulation_results)
+        simulation_results = _ensure_validated(simulation_results)
         # 选择几个典型日期
         hours = len(simulation_results)
         days_to_show = min(30, hours // 24)  # 最多显示30天
-        
-        frames = []
-        for day in range(days_to_show):
-            start_idx = day * 24
-            end_idx = start_idx + 24
-            
-            if end_idx <= hours:
-                daily_data = simulation_results.iloc[start_idx:end_idx].copy()
-                daily_data['hour'] = range(24)
-                
-                frame = go.Frame(
-                    data=[
-                        go.Scatter(
-                            x=daily_data['hour'],
-                            y=daily_data['mine_load_kw'],
-                            mode='lines+markers',
-                            name='矿区负荷',
-                            line=dict(color='red', width=3),
-                            marker=dict(size=8)
-                        ),
-                        go.Scatter(
-                            x=daily_data['hour'],
-                            y=daily_data['solar_power_kw'],
-                            mode='lines+markers',
-                            name='光伏发电',
-                            line=dict(color='orange', width=3),
-                            marker=dict(size=8)
-                        ),
-                        go.Scatter(
-                            x=daily_data['hour'],
-                            y=daily_data['wind_power_kw'],
-                            mode='lines+markers',
-                            name='风力发电',
-                            line=dict(color='skyblue', width=3),
-                            marker=dict(size=8)
-                        )
-                    ],
-                    name=f"第{day+1}天"
-                )
-                frames.append(frame)
-        
-        # 创建初始图表
-        initial_data = simulation_results.iloc[:24].copy()
-        initial_data['hour'] = range(24)
-        
-        fig = go.Figure(
-            data=[
-                go.Scatter(
-                    x=initial_data['hour'],
-                    y=initial_data['mine_load_kw'],
-                    mode='lines+markers',
-                    name='矿区负荷',
-                    line=dict(color='red', width=3)
-                ),
-                go.Scatter(
-                    x=initial_data['hour'],
-                    y=initial_data['solar_power_kw'],
-                    mode='lines+markers',
-                    name='光伏发电',
-                    line=dict(color='orange', width=3)
-                ),
-                go.Scatter(
-                    x=initial_data['hour'],
-                    y=initial_data['wind_power_kw'],
-                    mode='lines+markers',
-                    name='风力发电',
-                    line=dict(color='skyblue', width=3)
-                )
-            ],
-            frames=frames
+
+        # 三列堆成长表后交给plotly express生成动画：px按帧只发数据
+        # 差量，不再为每帧重复go.Frame里的trace样式元数据
+        span = days_to_show * 24
+        values = simulation_results[
+            ['mine_load_kw', 'solar_power_kw', 'wind_power_kw']
+        ].to_numpy()[:span]
+        series_names = ['矿区负荷', '光伏发电', '风力发电']
+        long_df = pd.DataFrame({
+            'hour': np.tile(np.arange(24), days_to_show * 3),
+            'day': np.tile(np.repeat(np.arange(1, days_to_show + 1), 24), 3),
+            'series': np.repeat(series_names, span),
+            'value': values.T.ravel()
+        })
+
+        fig = px.line(
+            long_df, x='hour', y='value',
+            color='series', animation_frame='day',
+            markers=True,
+            color_discrete_map={
+                '矿区负荷': 'red',
+                '光伏发电': 'orange',
+                '风力发电': 'skyblue'
+            },
+            labels={'hour': '小时', 'value': '功率 (kW)',
+                    'day': '天数', 'series': ''}
         )
-        
-        # 添加播放控制
+
+        # y轴范围固定为全期最大值，切换帧时坐标不跳动
+        fig.update_yaxes(range=[0, float(values.max()) * 1.05])
         fig.update_layout(
             title="📅 动画日负荷曲线分析",
-            xaxis_title="小时",
-            yaxis_title="功率 (kW)",
-            height=500,
-            updatemenus=[{
-                "buttons": [
-                    {
-                        "args": [None, {"frame": {"duration": 500, "redraw": True},
-                                      "fromcurrent": True, "transition": {"duration": 300}}],
-                        "label": "播放",
-                        "method": "animate"
-                    },
-                    {
-                        "args": [[None], {"frame": {"duration": 0, "redraw": True},
-                                        "mode": "immediate", "transition": {"duration": 0}}],
-                        "label": "暂停",
-                        "method": "animate"
-                    }
-                ],
-                "direction": "left",
-                "pad": {"r": 10, "t": 87},
-                "showactive": False,
-                "type": "buttons",
-                "x": 0.1,
-                "xanchor": "right",
-                "y": 0,
-                "yanchor": "top"
-            }],
-            sliders=[{
-                "active": 0,
-                "yanchor": "top",
-                "xanchor": "left",
-                "currentvalue": {
-                    "font": {"size": 20},
-                    "prefix": "天数:",
-                    "visible": True,
-                    "xanchor": "right"
-                },
-                "transition": {"duration": 300, "easing": "cubic-in-out"},
-                "pad": {"b": 10, "t": 50},
-                "len": 0.9,
-                "x": 0.1,
-                "y": 0,
-                "steps": [
-                    {
-                        "args": [[f"第{i+1}天"], {
-                            "frame": {"duration": 300, "redraw": True},
-                            "mode": "immediate",
-                            "transition": {"duration": 300}
-                        }],
-                        "label": f"第{i+1}天",
-                        "method": "animate"
-                    } for i in range(len(frames))
-                ]
-            }]
+            height=500
         )
-        
+
         return fig
         
     except Exception as e:
         st.error(f"动画图表创建失败: {e}")
         return None
 
+@st.cache_data(**_FIGURE_CACHE_KWARGS)
 def create_heatmap_analysis(simulation_results):
     """创建热力图分析"""
     try:
         # 验证和修复数据
-        simulation_results = validate_and_fix_data(simulation_results)
+        simulation_results = _ensure_validated(simulation_results)
         # 重塑数据为24小时 x 365天的矩阵
         hours = len(simulation_results)
         days = hours // 24
-        
-        # 创建负荷热力图数据
-        load_matrix = simulation_results['mine_load_kw'].values[:days*24].reshape(days, 24)
-        solar_matrix = simulation_results['solar_power_kw'].values[:days*24].reshape(days, 24)
-        wind_matrix = simulation_results['wind_power_kw'].values[:days*24].reshape(days, 24)
+
+        # 创建热力图数据：三列一次性取成float32块，再按列切reshape视图，
+        # 避免三次独立的列物化拷贝，payload字节数也减半
+        arr = simulation_results[
+            ['mine_load_kw', 'solar_power_kw', 'wind_power_kw']
+        ].to_numpy(dtype=np.float32, copy=False)[:days * 24]
+        load_matrix, solar_matrix, wind_matrix = arr.reshape(days, 24, 3).transpose(2, 0, 1)
+
+        # 轴坐标用ndarray传入：Plotly对numpy类型数组走base64二进制
+        # (bdata)序列化，z矩阵的float32块同样按原始字节发往前端；
+        # 小时/天序号用int16足够，每个坐标2字节
+        hour_axis = np.arange(24, dtype=np.int16)
+        day_axis = np.arange(days, dtype=np.int16)
         
         # 创建子图
         fig = make_subplots(
@@ -293,8 +330,8 @@ def create_heatmap_analysis(simulation_results):
         fig.add_trace(
             go.Heatmap(
                 z=load_matrix,
-                x=list(range(24)),
-                y=list(range(days)),
+                x=hour_axis,
+                y=day_axis,
                 colorscale='Reds',
                 name='负荷',
                 hovertemplate='小时: %{x}<br>天数: %{y}<br>负荷: %{z:.0f}kW<extra></extra>'
@@ -306,8 +343,8 @@ def create_heatmap_analysis(simulation_results):
         fig.add_trace(
             go.Heatmap(
                 z=solar_matrix,
-                x=list(range(24)),
-                y=list(range(days)),
+                x=hour_axis,
+                y=day_axis,
                 colorscale='YlOrRd',
                 name='光伏',
                 hovertemplate='小时: %{x}<br>天数: %{y}<br>光伏: %{z:.0f}kW<extra></extra>'
@@ -319,8 +356,8 @@ def create_heatmap_analysis(simulation_results):
         fig.add_trace(
             go.Heatmap(
                 z=wind_matrix,
-                x=list(range(24)),
-                y=list(range(days)),
+                x=hour_axis,
+                y=day_axis,
                 colorscale='Blues',
                 name='风电',
                 hovertemplate='小时: %{x}<br>天数: %{y}<br>风电: %{z:.0f}kW<extra></extra>'
@@ -345,31 +382,40 @@ def create_heatmap_analysis(simulation_results):
         st.error(f"热力图创建失败: {e}")
         return None
 
+@st.cache_data(**_FIGURE_CACHE_KWARGS)
 def create_radar_chart_comparison(simulation_results):
     """创建雷达图对比分析"""
     try:
         # 验证和修复数据
-        simulation_results = validate_and_fix_data(simulation_results)
-        # 计算各项指标
-        total_load = simulation_results['mine_load_kw'].sum()
-        renewable_gen = simulation_results['renewable_total_kw'].sum()
-        grid_purchase = simulation_results['grid_buy_kw'].sum()
-        # 计算电池活跃周期（充电或放电时）
-        battery_active = (simulation_results['battery_charge_kw'] != 0) | (simulation_results['battery_discharge_kw'] != 0)
-        battery_cycles = len(simulation_results[battery_active])
-        
+        simulation_results = _ensure_validated(simulation_results)
+        # 计算各项指标：四列年度总量在同一数值块上单次reduce，
+        # 代替四次独立的逐列.sum()
+        arr = simulation_results[
+            ['mine_load_kw', 'renewable_total_kw', 'grid_buy_kw', 'grid_cost_usd']
+        ].to_numpy()
+        total_load, renewable_gen, grid_purchase, grid_cost_total = arr.sum(
+            axis=0, dtype=np.float64
+        )
+        grid_buy = arr[:, 2]
+        # 计算电池活跃周期（充电或放电时）：调度引擎保证同一小时
+        # 充放电互斥，两次count_nonzero相加即可，无需构造布尔掩码
+        battery_cycles = (
+            np.count_nonzero(simulation_results['battery_charge_kw'].to_numpy()) +
+            np.count_nonzero(simulation_results['battery_discharge_kw'].to_numpy())
+        )
+
         # 标准化指标（0-100分）
         renewable_score = min(100, (renewable_gen / total_load) * 100) if total_load > 0 else 0
         efficiency_score = min(100, ((total_load - grid_purchase) / total_load) * 100) if total_load > 0 else 0
 
-        # 稳定性计算（避免除零错误）
-        grid_buy_mean = simulation_results['grid_buy_kw'].mean()
+        # 稳定性计算（避免除零错误；均值复用总量，免去一次遍历）
+        grid_buy_mean = grid_purchase / len(grid_buy) if len(grid_buy) else 0
         if grid_buy_mean > 0:
-            stability_score = min(100, 100 - (simulation_results['grid_buy_kw'].std() / grid_buy_mean) * 10)
+            stability_score = min(100, 100 - (grid_buy.std(ddof=1) / grid_buy_mean) * 10)
         else:
             stability_score = 100  # 如果没有购电，稳定性满分
 
-        economics_score = max(0, 100 - (simulation_results['grid_cost_usd'].sum() / 1000))  # 简化计算
+        economics_score = max(0, 100 - (grid_cost_total / 1000))  # 简化计算
         sustainability_score = renewable_score * 0.8 + efficiency_score * 0.2
         
         categories = ['可再生能源', '能源效率', '系统稳定性', '经济性', '可持续性']
@@ -415,20 +461,21 @@ def create_radar_chart_comparison(simulation_results):
         st.error(f"雷达图创建失败: {e}")
         return None
 
+@st.cache_data(**_FIGURE_CACHE_KWARGS)
 def create_waterfall_chart(simulation_results):
     """创建瀑布图显示能量平衡"""
     try:
         # 验证和修复数据
-        simulation_results = validate_and_fix_data(simulation_results)
-        # 计算年度能量数据 (MWh)
-        total_load = simulation_results['mine_load_kw'].sum() / 1000
-        solar_gen = simulation_results['solar_power_kw'].sum() / 1000
-        wind_gen = simulation_results['wind_power_kw'].sum() / 1000
-        grid_purchase = simulation_results['grid_buy_kw'].sum() / 1000
-        grid_sell = -simulation_results['grid_sell_kw'].sum() / 1000  # 负值表示输出
-        # 计算电池损失（充放电损失）
-        battery_charge_total = simulation_results['battery_charge_kw'].sum() / 1000
-        battery_discharge_total = simulation_results['battery_discharge_kw'].sum() / 1000
+        simulation_results = _ensure_validated(simulation_results)
+        # 计算年度能量数据 (MWh)：七列总量在同一数值块上单次reduce
+        totals = simulation_results[
+            ['mine_load_kw', 'solar_power_kw', 'wind_power_kw',
+             'grid_buy_kw', 'grid_sell_kw',
+             'battery_charge_kw', 'battery_discharge_kw']
+        ].to_numpy().sum(axis=0, dtype=np.float64) / 1000.0
+        (total_load, solar_gen, wind_gen, grid_purchase,
+         grid_sell, battery_charge_total, battery_discharge_total) = totals
+        grid_sell = -grid_sell  # 负值表示输出
         # 电池损失 = 充电量 * 损失率
         battery_loss = battery_charge_total * 0.15 if battery_charge_total > 0 else 0
         
@@ -4,19 +4,26 @@
 包含任务队列、进度跟踪、后台处理等功能
 """
 
-import asyncio
-import threading
-import time
+import itertools
+import os
+import pickle
 import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
 from datetime import datetime
 from typing import Dict, Any, Callable, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
+import numpy as np
 import streamlit as st
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 当前任务ID上下文变量 - 任务函数内通过TASK_ID.get()获取自己的任务ID
+TASK_ID: ContextVar[str] = ContextVar("task_id", default="unknown")
+
 class TaskStatus(Enum):
     """任务状态枚举"""
     PENDING = "pending"
@@ -25,9 +32,13 @@ class TaskStatus(Enum):
     FAILED = "failed"
     CANCELLED = "cancelled"
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TaskResult:
-    """任务结果数据类"""
+    """任务结果数据类
+
+    不可变快照：状态更新通过dataclasses.replace整体替换dict条目，
+    CPython下单键dict读写是原子的，读取方无需加锁。
+    """
     task_id: str
     status: TaskStatus
     result: Any = None
@@ -40,10 +51,21 @@ class TaskResult:
 class AsyncTaskManager:
     """异步任务管理器"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = None):
+        # 任务快照表：值为不可变TaskResult，更新即整体替换，
+        # 1Hz进度轮询的读取不再与工作线程争抢同一把锁
         self.tasks: Dict[str, TaskResult] = {}
-        self.running_tasks: Dict[str, threading.Thread] = {}
-        self._lock = threading.Lock()
+        self.running_tasks: Dict[str, Future] = {}
+        # 任务ID：进程级随机前缀 + 递增计数器。uuid4每次要读urandom，
+        # 批量提交路径上计数器的纳秒级开销更合适；next()在GIL下原子
+        self._id_prefix = uuid.uuid4().hex[:8]
+        self._id_counter = itertools.count()
+        # 复用线程池：避免每次提交都创建/销毁线程，并限制并发数，
+        # 防止用户连续点击按钮时任务无界堆积撑爆内存
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix='task_worker'
+        )
     
     def submit_task(self, func: Callable, *args, **kwargs) -> str:
         """
@@ -56,36 +78,31 @@ class AsyncTaskManager:
         返回:
         - str: 任务ID
         """
-        task_id = str(uuid.uuid4())
-        
-        with self._lock:
-            self.tasks[task_id] = TaskResult(
-                task_id=task_id,
-                status=TaskStatus.PENDING,
-                start_time=datetime.now()
-            )
-        
-        # 创建并启动线程
-        thread = threading.Thread(
-            target=self._execute_task,
-            args=(task_id, func, args, kwargs),
-            daemon=True,
-            name=f"task_{task_id}"  # 设置线程名称以便进度跟踪
+        task_id = f"{self._id_prefix}-{next(self._id_counter)}"
+
+        self.tasks[task_id] = TaskResult(
+            task_id=task_id,
+            status=TaskStatus.PENDING,
+            start_time=datetime.now()
         )
         
-        self.running_tasks[task_id] = thread
-        thread.start()
+        # 提交到共享线程池（线程复用，排队执行）
+        future = self._executor.submit(self._execute_task, task_id, func, args, kwargs)
+        self.running_tasks[task_id] = future
         
         logger.info(f"任务 {task_id} 已提交")
         return task_id
     
     def _execute_task(self, task_id: str, func: Callable, args: tuple, kwargs: dict):
         """执行任务的内部方法"""
+        TASK_ID.set(task_id)
+
         try:
-            with self._lock:
-                if task_id in self.tasks:
-                    self.tasks[task_id].status = TaskStatus.RUNNING
-                    self.tasks[task_id].start_time = datetime.now()
+            task = self.tasks.get(task_id)
+            if task is not None:
+                self.tasks[task_id] = replace(
+                    task, status=TaskStatus.RUNNING, start_time=datetime.now()
+                )
             
             logger.info(f"开始执行任务 {task_id}")
             
@@ -94,65 +111,68 @@ class AsyncTaskManager:
             
             # 更新任务状态
             end_time = datetime.now()
-            with self._lock:
-                if task_id in self.tasks:
-                    task = self.tasks[task_id]
-                    task.status = TaskStatus.COMPLETED
-                    task.result = result
-                    task.end_time = end_time
-                    task.progress = 1.0
-                    if task.start_time:
-                        task.execution_time = (end_time - task.start_time).total_seconds()
+            task = self.tasks.get(task_id)
+            if task is not None:
+                execution_time = (
+                    (end_time - task.start_time).total_seconds()
+                    if task.start_time else None
+                )
+                self.tasks[task_id] = replace(
+                    task, status=TaskStatus.COMPLETED, result=result,
+                    end_time=end_time, progress=1.0,
+                    execution_time=execution_time
+                )
             
             logger.info(f"任务 {task_id} 执行完成")
             
         except Exception as e:
             logger.error(f"任务 {task_id} 执行失败: {e}")
             
-            with self._lock:
-                if task_id in self.tasks:
-                    self.tasks[task_id].status = TaskStatus.FAILED
-                    self.tasks[task_id].error = str(e)
-                    self.tasks[task_id].end_time = datetime.now()
+            task = self.tasks.get(task_id)
+            if task is not None:
+                self.tasks[task_id] = replace(
+                    task, status=TaskStatus.FAILED, error=str(e),
+                    end_time=datetime.now()
+                )
         
         finally:
-            # 清理线程引用
-            if task_id in self.running_tasks:
-                del self.running_tasks[task_id]
+            # 清理future引用（pop原子移除，与无锁快照表一致）
+            self.running_tasks.pop(task_id, None)
     
     def get_task_status(self, task_id: str) -> Optional[TaskResult]:
-        """获取任务状态"""
-        with self._lock:
-            return self.tasks.get(task_id)
+        """获取任务状态（无锁读取不可变快照）"""
+        return self.tasks.get(task_id)
     
     def cancel_task(self, task_id: str) -> bool:
         """取消任务"""
-        with self._lock:
-            if task_id in self.tasks and self.tasks[task_id].status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
-                self.tasks[task_id].status = TaskStatus.CANCELLED
-                self.tasks[task_id].end_time = datetime.now()
-                
-                # 尝试停止线程（注意：Python线程无法强制停止）
-                if task_id in self.running_tasks:
-                    logger.warning(f"任务 {task_id} 已标记为取消，但线程可能仍在运行")
-                
-                return True
+        task = self.tasks.get(task_id)
+        if task is not None and task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
+            self.tasks[task_id] = replace(
+                task, status=TaskStatus.CANCELLED, end_time=datetime.now()
+            )
+
+            # 若任务还在队列中，future.cancel()可阻止其启动；
+            # 已开始执行的任务无法强制停止，只能标记状态
+            future = self.running_tasks.get(task_id)
+            if future is not None and not future.cancel():
+                logger.warning(f"任务 {task_id} 已标记为取消，但工作线程可能仍在运行")
+
+            return True
         return False
     
     def cleanup_completed_tasks(self, max_age_hours: int = 24):
         """清理已完成的旧任务"""
         current_time = datetime.now()
-        to_remove = []
-        
-        with self._lock:
-            for task_id, task in self.tasks.items():
-                if (task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED] 
-                    and task.end_time 
-                    and (current_time - task.end_time).total_seconds() > max_age_hours * 3600):
-                    to_remove.append(task_id)
-            
-            for task_id in to_remove:
-                del self.tasks[task_id]
+
+        # 在条目快照上遍历，逐键pop（CPython下原子），无需全局锁
+        to_remove = [
+            task_id for task_id, task in list(self.tasks.items())
+            if (task.status in [TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED]
+                and task.end_time
+                and (current_time - task.end_time).total_seconds() > max_age_hours * 3600)
+        ]
+        for task_id in to_remove:
+            self.tasks.pop(task_id, None)
         
         if to_remove:
             logger.info(f"清理了 {len(to_remove)} 个过期任务")
@@ -189,115 +209,151 @@ class ProgressTracker:
         self.current_step = step
         
         progress = min(step / self.total_steps, 1.0)
-        
-        with task_manager._lock:
-            if self.task_id in task_manager.tasks:
-                task_manager.tasks[self.task_id].progress = progress
+
+        task = task_manager.tasks.get(self.task_id)
+        # 仅在任务仍在运行时推进进度，避免覆盖已取消/已结束的快照
+        if task is not None and task.status == TaskStatus.RUNNING:
+            task_manager.tasks[self.task_id] = replace(task, progress=progress)
         
         if message:
             logger.info(f"任务 {self.task_id}: {message} ({progress*100:.1f}%)")
 
-def create_progress_ui(task_id: str, title: str = "处理中..."):
-    """
-    创建进度显示UI
-    
-    参数:
-    - task_id: 任务ID
-    - title: 显示标题
-    
-    返回:
-    - TaskResult: 任务结果（如果完成）
-    """
+@st.fragment(run_every=1.0)
+def _progress_fragment(task_id: str, title: str):
+    """进度面板片段：每秒只重跑此片段，任务结束后触发整页刷新"""
     task = task_manager.get_task_status(task_id)
-    
     if not task:
         st.error("任务不存在")
-        return None
-    
-    # 创建进度显示
+        return
+
     if task.status == TaskStatus.PENDING:
         st.info("⏳ 任务等待中...")
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-        status_text.text("准备开始...")
-        
-    elif task.status == TaskStatus.RUNNING:
+        st.progress(0, text="准备开始...")
+        return
+
+    if task.status == TaskStatus.RUNNING:
         st.info(f"🔄 {title}")
-        progress_bar = st.progress(task.progress)
-        status_text = st.empty()
-        
         if task.start_time:
             elapsed = (datetime.now() - task.start_time).total_seconds()
-            status_text.text(f"已运行 {elapsed:.1f} 秒 - 进度: {task.progress*100:.1f}%")
+            progress_text = f"已运行 {elapsed:.1f} 秒 - 进度: {task.progress*100:.1f}%"
         else:
-            status_text.text(f"进度: {task.progress*100:.1f}%")
-        
+            progress_text = f"进度: {task.progress*100:.1f}%"
+        st.progress(min(task.progress, 1.0), text=progress_text)
+
         # 添加取消按钮
         if st.button("❌ 取消任务", key=f"cancel_{task_id}"):
             if task_manager.cancel_task(task_id):
                 st.warning("任务已取消")
-                st.rerun()
-        
-    elif task.status == TaskStatus.COMPLETED:
+        return
+
+    # 终止态：片段内不渲染结果，交还主脚本统一展示
+    st.rerun(scope="app")
+
+
+def create_progress_ui(task_id: str, title: str = "处理中..."):
+    """
+    创建进度显示UI
+
+    运行中的任务由@st.fragment(run_every=1.0)片段每秒自刷新，
+    不再用time.sleep+st.rerun阻塞整个脚本线程、重跑所有图表。
+
+    参数:
+    - task_id: 任务ID
+    - title: 显示标题
+
+    返回:
+    - TaskResult: 任务结果（如果完成）
+    """
+    task = task_manager.get_task_status(task_id)
+
+    if not task:
+        st.error("任务不存在")
+        return None
+
+    if task.status == TaskStatus.COMPLETED:
         st.success("✅ 任务完成！")
         if task.execution_time:
             st.info(f"⏱️ 执行时间: {task.execution_time:.2f} 秒")
         return task
-        
-    elif task.status == TaskStatus.FAILED:
+
+    if task.status == TaskStatus.FAILED:
         st.error(f"❌ 任务失败: {task.error}")
         return task
-        
-    elif task.status == TaskStatus.CANCELLED:
+
+    if task.status == TaskStatus.CANCELLED:
         st.warning("⚠️ 任务已取消")
         return task
-    
-    # 自动刷新页面以更新进度
-    if task.status in [TaskStatus.PENDING, TaskStatus.RUNNING]:
-        time.sleep(1)
-        st.rerun()
-    
+
+    # 等待/运行中：进入自刷新片段
+    _progress_fragment(task_id, title)
     return None
 
+def _apply_item(process_func: Callable, item):
+    """对单个项目应用处理函数，失败时返回None（模块级定义以便跨进程序列化）"""
+    try:
+        return process_func(item)
+    except Exception as e:
+        logger.error(f"批处理项目失败: {e}")
+        return None
+
+
 def batch_processor(items: list, process_func: Callable, batch_size: int = 100, task_id: str = None):
     """
-    批处理器 - 分批处理大数据集
-    
+    批处理器 - 并行处理大数据集
+
+    CPU密集的处理函数在进程池中按chunksize分发执行，绕开GIL随核数
+    扩展；处理函数不可序列化（如lambda/闭包）时回退为原来的串行循环。
+
     参数:
     - items: 要处理的项目列表
     - process_func: 处理函数
-    - batch_size: 批处理大小
+    - batch_size: 批处理大小（同时作为进程池的分发块大小）
     - task_id: 任务ID（用于进度跟踪）
-    
+
     返回:
     - list: 处理结果列表
     """
     results = []
     total_batches = len(items) // batch_size + (1 if len(items) % batch_size else 0)
-    
+
     tracker = ProgressTracker(task_id) if task_id else None
-    
-    for i in range(0, len(items), batch_size):
-        batch = items[i:i + batch_size]
-        batch_results = []
-        
-        for item in batch:
-            try:
-                result = process_func(item)
-                batch_results.append(result)
-            except Exception as e:
-                logger.error(f"批处理项目失败: {e}")
-                batch_results.append(None)
-        
-        results.extend(batch_results)
-        
-        # 更新进度
-        if tracker:
-            current_batch = i // batch_size + 1
-            tracker.update_progress(
-                current_batch, 
-                total_batches, 
-                f"已处理 {current_batch}/{total_batches} 批次"
+
+    # 向量化快速路径：numpy ufunc（或显式标记__vectorized__的函数）
+    # 对整个数组一次调用，免去逐项的Python调用和进程间序列化
+    if isinstance(process_func, np.ufunc) or getattr(process_func, '__vectorized__', False):
+        try:
+            results = list(process_func(np.asarray(items)))
+            if tracker and total_batches:
+                tracker.update_progress(total_batches, total_batches,
+                                        f"已处理 {total_batches}/{total_batches} 批次")
+            return results
+        except Exception as e:
+            logger.warning(f"向量化批处理失败，回退逐项执行: {e}")
+
+    try:
+        with ProcessPoolExecutor() as executor:
+            mapped = executor.map(
+                partial(_apply_item, process_func), items, chunksize=batch_size
             )
-    
-    return results
+            for i, result in enumerate(mapped, start=1):
+                results.append(result)
+                # 更新进度（按批次粒度，与原串行实现一致）
+                if tracker and i % batch_size == 0:
+                    current_batch = i // batch_size
+                    tracker.update_progress(
+                        current_batch,
+                        total_batches,
+                        f"已处理 {current_batch}/{total_batches} 批次"
+                    )
+        if tracker and total_batches:
+            tracker.update_progress(total_batches, total_batches,
+                                    f"已处理 {total_batches}/{total_batches} 批次")
+        return results
+    except (pickle.PicklingError, TypeError, AttributeError, OSError) as e:
+        # 序列化失败或进程池不可用：回退串行路径
+        logger.warning(f"进程池批处理不可用，回退串行执行: {e}")
+        results = [_apply_item(process_func, item) for item in items]
+        if tracker and total_batches:
+            tracker.update_progress(total_batches, total_batches,
+                                    f"已处理 {total_batches}/{total_batches} 批次")
+        return results
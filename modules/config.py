@@ -4,6 +4,8 @@
 包含默认参数、风机数据库、系统配置等
 """
 
+import types
+
 import pandas as pd
 import numpy as np
 
@@ -111,6 +113,13 @@ DEFAULT_CONFIG = {
     }
 }
 
+# 负荷模式预编译：导入时一次性转为只读float32数组，
+# 下游数值计算直接复用，免去每次调用的list->ndarray转换
+for _profile in DEFAULT_CONFIG["load_profiles"].values():
+    _profile["pattern_arr"] = np.asarray(_profile["pattern"], dtype=np.float32)
+    _profile["pattern_arr"].setflags(write=False)
+del _profile
+
 # ==================== 风机数据库 ====================
 
 WIND_TURBINE_DATABASE = {
@@ -160,6 +169,33 @@ WIND_TURBINE_DATABASE = {
     }
 }
 
+# 风机数值参数的SoA视图：导入时把各型号的数值字段压成一个结构化数组，
+# 机群级批量计算（按额定功率排序/筛选、整场功率曲线）可直接向量化，
+# 不必逐型号做Python字典遍历。文本字段仍走get_wind_turbine_info
+_WT_DTYPE = np.dtype([
+    ('rated_power', 'f4'), ('hub_height', 'f4'),
+    ('cut_in_speed', 'f4'), ('rated_speed', 'f4'),
+    ('cut_out_speed', 'f4'), ('rotor_diameter', 'f4')
+])
+_WT_ARRAY = np.array(
+    [tuple(info[name] for name in _WT_DTYPE.names)
+     for info in WIND_TURBINE_DATABASE.values()],
+    dtype=_WT_DTYPE
+)
+_WT_ARRAY.setflags(write=False)
+_WT_INDEX = {name: i for i, name in enumerate(WIND_TURBINE_DATABASE)}
+
+
+def get_wind_turbine_array():
+    """
+    获取风机数值参数的结构化数组
+
+    返回:
+    - (numpy.ndarray, dict): 只读结构化数组与型号->行号索引
+    """
+    return _WT_ARRAY, _WT_INDEX
+
+
 # ==================== 颜色主题配置 ====================
 
 COLOR_THEMES = {
@@ -183,6 +219,12 @@ COLOR_THEMES = {
     }
 }
 
+# 冻结为只读视图：get_color_theme直接返回常量字典，
+# 零拷贝的同时防止下游误改共享配置
+COLOR_THEMES = types.MappingProxyType({
+    name: types.MappingProxyType(theme) for name, theme in COLOR_THEMES.items()
+})
+
 # ==================== 单位转换配置 ====================
 
 UNIT_CONVERSIONS = {
@@ -206,32 +248,57 @@ UNIT_CONVERSIONS = {
     }
 }
 
+# 扁平化的(源单位, 目标单位) -> 系数表：功率/能量单位不重叠，
+# 合并后热路径单位转换只做一次哈希查找；同样冻结为只读
+UNIT_CONVERSION_FACTORS = types.MappingProxyType({
+    key: factor
+    for category in UNIT_CONVERSIONS.values()
+    for key, factor in category.items()
+})
+
+UNIT_CONVERSIONS = types.MappingProxyType({
+    name: types.MappingProxyType(table)
+    for name, table in UNIT_CONVERSIONS.items()
+})
+
 # ==================== 配置访问函数 ====================
 
+# 扁平化配置表：(节, 键) -> 值，导入时构建一次，
+# 热路径上的get_config(section, key)只做一次哈希查找
+_FLAT_CONFIG = {
+    (_section, _key): _value
+    for _section, _section_dict in DEFAULT_CONFIG.items()
+    for _key, _value in _section_dict.items()
+}
+
+_MISSING = object()
+
+
 def get_config(section=None, key=None):
     """
     获取配置参数
-    
+
     参数:
     - section: str, 配置节名称
     - key: str, 配置键名称
-    
+
     返回:
     - 配置值或整个配置字典
     """
     if section is None:
         return DEFAULT_CONFIG
-    
-    if section not in DEFAULT_CONFIG:
-        raise KeyError(f"配置节 '{section}' 不存在")
-    
+
     if key is None:
+        if section not in DEFAULT_CONFIG:
+            raise KeyError(f"配置节 '{section}' 不存在")
         return DEFAULT_CONFIG[section]
-    
-    if key not in DEFAULT_CONFIG[section]:
+
+    value = _FLAT_CONFIG.get((section, key), _MISSING)
+    if value is _MISSING:
+        if section not in DEFAULT_CONFIG:
+            raise KeyError(f"配置节 '{section}' 不存在")
         raise KeyError(f"配置键 '{key}' 在节 '{section}' 中不存在")
-    
-    return DEFAULT_CONFIG[section][key]
+    return value
 
 def get_wind_turbine_info(turbine_model):
     """
@@ -271,14 +338,14 @@ def get_load_profile_pattern(profile_name):
     - profile_name: str, 负荷模式名称
     
     返回:
-    - list: 24小时负荷模式数组
+    - numpy.ndarray: 24小时负荷模式数组（只读float32，导入时预编译）
     """
     load_profiles = get_config("load_profiles")
-    
+
     if profile_name not in load_profiles:
         raise KeyError(f"负荷模式 '{profile_name}' 不存在")
-    
-    return load_profiles[profile_name]["pattern"]
+
+    return load_profiles[profile_name]["pattern_arr"]
 
 def validate_config():
     """
@@ -4,72 +4,152 @@
 包含负荷数据生成和气象数据获取功能
 """
 
+import functools
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import requests
 from datetime import datetime, timedelta
+from pathlib import Path
 from .config import get_config, get_load_profile_pattern
 from .performance import monitor_data_loading
 
-@st.cache_data
+# JSON解析器：整年小时数据约4万个数值，优先用C实现的orjson解析，
+# 未安装时回退标准库json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# 磁盘缓存配置
+WEATHER_CACHE_DIR = Path(".cache")
+WEATHER_CACHE_TTL_SECONDS = 30 * 86400  # 历史气象数据30天内视为有效
+
+# 复用的HTTP会话（延迟创建）：keep-alive省去每次请求的TCP+TLS握手，
+# gzip压缩把整年小时数据的传输量缩小约一个数量级
+_SESSION = None
+
+
+def _session():
+    """获取模块级requests.Session（首次调用时创建）"""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        s = requests.Session()
+        s.headers.update({'Accept-Encoding': 'gzip'})
+        s.mount('https://',
+                requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _SESSION = s
+    return _SESSION
+
+# 8760小时的时间索引：导入时构建一次，所有负荷/气象序列共享
+# （pandas索引不可变，跨Series复用安全）；其他年份按需缓存
+_HOURLY_INDEX_2023 = pd.date_range(datetime(2023, 1, 1), periods=8760, freq='h')
+_HOURLY_INDEX_CACHE = {2023: _HOURLY_INDEX_2023}
+
+
+def _weather_cache_path(latitude, longitude, year):
+    """构造气象数据磁盘缓存文件路径（按经纬度和年份唯一）"""
+    return WEATHER_CACHE_DIR / f"weather_{latitude:.3f}_{longitude:.3f}_{year}.parquet"
+
+
+def _read_weather_cache(cache_path, allow_stale=False):
+    """读取磁盘缓存的气象数据，过期或损坏时返回None
+
+    allow_stale=True时忽略TTL：历史年份的数据本身不可变，
+    网络失败时过期副本仍好过没有数据。
+    """
+    try:
+        if cache_path is not None and cache_path.exists():
+            age_seconds = datetime.now().timestamp() - cache_path.stat().st_mtime
+            if allow_stale or age_seconds < WEATHER_CACHE_TTL_SECONDS:
+                return pd.read_parquet(cache_path)
+    except Exception:
+        # 缓存文件损坏时忽略，回退到API请求
+        pass
+    return None
+
+
+def _stale_weather_fallback(cache_path, reason):
+    """网络失败时回退到过期的磁盘缓存（stale-while-error），无副本则返回None"""
+    stale_df = _read_weather_cache(cache_path, allow_stale=True)
+    if stale_df is not None:
+        st.warning(f"{reason}，已使用本地缓存的历史气象数据")
+    return stale_df
+
+
+def _write_weather_cache(cache_path, weather_df):
+    """将气象数据写入磁盘缓存（失败不影响主流程）"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        weather_df.to_parquet(cache_path)
+    except Exception:
+        pass
+
+
+@functools.lru_cache(maxsize=32)
+def _load_profile_values(profile_name, annual_consumption_gwh):
+    """
+    生成缩放后的8760小时负荷数组（进程级lru_cache）
+
+    纯数值核心与外层的st.cache_data分离：st.cache_data要做pickle
+    序列化和参数哈希，进程内重复调用直接命中这层只付一次dict查找。
+    """
+    daily_pattern = np.asarray(get_load_profile_pattern(profile_name),
+                               dtype=np.float32)
+
+    # 先在24元素模式上求缩放因子，再tile展开：
+    # 一次8760元素的写入代替"tile -> 全量求和 -> 全量乘法"三趟。
+    # 单位转换: GWh -> kWh (1 GWh = 1,000,000 kWh)
+    target_total_kwh = annual_consumption_gwh * 1_000_000
+    scaling_factor = np.float32(
+        target_total_kwh / (float(daily_pattern.sum()) * 365)
+    )
+
+    # 实际负荷值 (kW)，float32精度对kW级负荷足够；
+    # 截取前8760小时（处理闰年情况）
+    values = np.tile(daily_pattern * scaling_factor, 365)[:8760]
+    values.setflags(write=False)
+    return values
+
+
+@st.cache_data(persist="disk")
 @monitor_data_loading
 def load_mine_load_profile(profile_name, annual_consumption_gwh):
     """
     根据用户选择的负荷曲线类型和年总用电量，生成一年8760个小时的用电负荷序列
-    
+
     参数:
     - profile_name: str, 负荷类型 ('24小时连续生产型' 或 '白班为主型')
     - annual_consumption_gwh: float, 年总用电量 (GWh)
-    
+
     返回:
     - pandas.Series: 包含8760个小时负荷值的时间序列 (kW)
     """
     try:
-        # 从配置文件获取负荷模式
         try:
-            daily_pattern = np.array(get_load_profile_pattern(profile_name))
+            actual_loads = _load_profile_values(profile_name,
+                                                float(annual_consumption_gwh))
         except KeyError:
             raise ValueError(f"不支持的负荷类型: {profile_name}")
-        
-        # 生成一年的负荷模式 (365天 × 24小时 = 8760小时)
-        annual_pattern = np.tile(daily_pattern, 365)
-        
-        # 确保精确为8760小时 (处理闰年情况)
-        annual_pattern = annual_pattern[:8760]
-        
-        # 计算缩放因子，使总用电量匹配用户输入
-        # 单位转换: GWh -> kWh (1 GWh = 1,000,000 kWh)
-        target_total_kwh = annual_consumption_gwh * 1_000_000
-        current_total = np.sum(annual_pattern)
-        scaling_factor = target_total_kwh / current_total
-        
-        # 应用缩放因子得到实际负荷值 (kW)
-        actual_loads = annual_pattern * scaling_factor
-        
-        # 创建时间索引 (2023年1月1日0时开始的小时频率)
-        start_date = datetime(2023, 1, 1)
-        time_index = pd.date_range(
-            start=start_date, 
-            periods=8760, 
-            freq='h'
-        )
-        
-        # 创建并返回Pandas Series
+
+        # 创建并返回Pandas Series（复用模块级2023年小时索引）
         load_series = pd.Series(
             data=actual_loads,
-            index=time_index,
+            index=_HOURLY_INDEX_2023,
             name=f'负荷_{profile_name}'
         )
-        
+
         return load_series
-        
+
     except Exception as e:
         st.error(f"负荷数据生成失败: {str(e)}")
         return None
 
 
-@st.cache_data
+@st.cache_data(persist="disk", ttl=WEATHER_CACHE_TTL_SECONDS)
 @monitor_data_loading
 def get_weather_data(latitude, longitude, year=None):
     """
@@ -83,10 +163,14 @@ def get_weather_data(latitude, longitude, year=None):
     返回:
     - pandas.DataFrame: 包含小时级气象数据的DataFrame
     """
+    # 延迟导入：requests只有走到API请求路径才需要，
+    # 缓存命中的运行不必付其导入开销
+    import requests
+
+    cache_path = None
     try:
         # 确定分析年份
         if year is None:
-            from datetime import datetime
             current_year = datetime.now().year
             # 如果当前年份还未结束，使用上一年
             if datetime.now().month < 12:
@@ -94,6 +178,12 @@ def get_weather_data(latitude, longitude, year=None):
             else:
                 year = current_year
 
+        # 优先读取磁盘缓存，避免重复下载相同的历史数据
+        cache_path = _weather_cache_path(latitude, longitude, year)
+        cached_df = _read_weather_cache(cache_path)
+        if cached_df is not None:
+            return cached_df
+
         # 构造Open-Meteo API URL
         base_url = "https://archive-api.open-meteo.com/v1/archive"
 
@@ -113,15 +203,15 @@ def get_weather_data(latitude, longitude, year=None):
             'timezone': 'UTC'
         }
         
-        # 发送API请求
-        response = requests.get(base_url, params=params, timeout=30)
+        # 发送API请求（复用会话连接）
+        response = _session().get(base_url, params=params, timeout=30)
         
         # 检查请求是否成功
         if response.status_code != 200:
             raise Exception(f"API请求失败，状态码: {response.status_code}")
         
-        # 解析JSON数据
-        data = response.json()
+        # 解析JSON数据（直接在原始字节上解析，跳过requests的编码探测）
+        data = _json_loads(response.content)
         
         # 检查API返回是否包含错误
         if 'error' in data:
@@ -130,37 +220,53 @@ def get_weather_data(latitude, longitude, year=None):
         # 提取小时数据
         hourly_data = data['hourly']
         
-        # 创建DataFrame
+        # 创建DataFrame：各列先转为float32数组再入列，
+        # 跳过pandas对Python list的逐元素dtype推断，
+        # 同时直接落在float32上（减半内存占用和下游计算的内存带宽）
         weather_df = pd.DataFrame({
-            'time': hourly_data['time'],
-            'temperature_2m': hourly_data['temperature_2m'],
-            'windspeed_10m': hourly_data['windspeed_10m'],
-            'ghi': hourly_data['shortwave_radiation'],  # Global Horizontal Irradiance
-            'dni': hourly_data['direct_normal_irradiance'],  # Direct Normal Irradiance
-            'dhi': hourly_data['diffuse_radiation']  # Diffuse Horizontal Irradiance
-        })
-        
-        # 转换时间列为DatetimeIndex
-        weather_df['time'] = pd.to_datetime(weather_df['time'])
-        weather_df.set_index('time', inplace=True)
-        
-        # 数据质量检查
-        if len(weather_df) != 8760:
+            'temperature_2m': np.asarray(hourly_data['temperature_2m'], dtype=np.float32),
+            'windspeed_10m': np.asarray(hourly_data['windspeed_10m'], dtype=np.float32),
+            'ghi': np.asarray(hourly_data['shortwave_radiation'], dtype=np.float32),  # Global Horizontal Irradiance
+            'dni': np.asarray(hourly_data['direct_normal_irradiance'], dtype=np.float32),  # Direct Normal Irradiance
+            'dhi': np.asarray(hourly_data['diffuse_radiation'], dtype=np.float32)  # Diffuse Horizontal Irradiance
+        }, copy=False)
+
+        # API按起止日期返回规整的逐时网格，直接赋预构建的年度索引，
+        # 免去对8760条ISO时间字符串的pd.to_datetime解析
+        if len(weather_df) == 8760:
+            weather_df.index = _HOURLY_INDEX_CACHE.setdefault(
+                year, pd.date_range(datetime(year, 1, 1), periods=8760, freq='h')
+            )
+        else:
+            # 数据质量检查：长度异常（闰年/数据缺口）时按实际长度建索引
             st.warning(f"气象数据长度异常: {len(weather_df)} 小时 (期望: 8760小时)")
-        
+            weather_df.index = pd.date_range(
+                datetime(year, 1, 1), periods=len(weather_df), freq='h'
+            )
+
+
         # 检查缺失值
         missing_data = weather_df.isnull().sum()
         if missing_data.any():
             st.warning(f"气象数据存在缺失值，已自动填充")
-            # 使用前向填充处理缺失值
-            weather_df.fillna(method='ffill', inplace=True)
-        
+            # 前向填充缺失值（fillna(method=...)已从pandas移除）
+            weather_df.ffill(inplace=True)
+
+        # 写入磁盘缓存，供后续相同参数的运行直接复用
+        _write_weather_cache(cache_path, weather_df)
+
         return weather_df
         
     except requests.exceptions.Timeout:
+        stale_df = _stale_weather_fallback(cache_path, "API请求超时")
+        if stale_df is not None:
+            return stale_df
         st.error("API请求超时，请检查网络连接或稍后重试")
         return None
     except requests.exceptions.ConnectionError:
+        stale_df = _stale_weather_fallback(cache_path, "网络连接错误")
+        if stale_df is not None:
+            return stale_df
         st.error("网络连接错误，请检查网络连接")
         return None
     except Exception as e:
@@ -188,12 +294,20 @@ def validate_data_quality(data, data_type="数据"):
     
     # 检查缺失值
     if hasattr(data, 'isnull'):
-        missing_count = data.isnull().sum()
-        if isinstance(missing_count, pd.Series):
-            total_missing = missing_count.sum()
+        arr = data.to_numpy()
+        if arr.dtype.kind == 'f':
+            # float数据在连续内存上做一趟isnan归约判断"有没有"，
+            # 常见的无缺失情形不再构造逐列布尔frame+两次求和
+            nan_mask = np.isnan(arr)
+            total_missing = int(nan_mask.sum()) if nan_mask.any() else 0
         else:
-            total_missing = missing_count
-            
+            # 混合dtype走pandas的通用isnull路径
+            missing_count = data.isnull().sum()
+            if isinstance(missing_count, pd.Series):
+                total_missing = int(missing_count.sum())
+            else:
+                total_missing = int(missing_count)
+
         if total_missing > 0:
             st.warning(f"{data_type}存在 {total_missing} 个缺失值")
     
@@ -212,15 +326,17 @@ def preprocess_data(data, fill_method='ffill'):
     """
     if data is None:
         return None
+
+    # 填充缺失值：无缺失时直接短路，免去整表填充扫描
+    # （'pad'/'backfill'是旧fillna(method=...)的别名，一并兼容）
+    if hasattr(data, 'fillna') and data.isnull().values.any():
+        if fill_method in ('ffill', 'pad'):
+            data = data.ffill()
+        elif fill_method in ('bfill', 'backfill'):
+            data = data.bfill()
+        else:
+            raise ValueError(f"不支持的填充方法: {fill_method}")
     
-    # 填充缺失值
-    if hasattr(data, 'fillna'):
-        data = data.fillna(method=fill_method)
-    
-    # 确保数据为数值类型
-    if hasattr(data, 'select_dtypes'):
-        numeric_columns = data.select_dtypes(include=[np.number]).columns
-        for col in numeric_columns:
-            data[col] = pd.to_numeric(data[col], errors='coerce')
-    
+    # 数值类型检查：select_dtypes(np.number)选出的列本就是数值dtype，
+    # 原先逐列pd.to_numeric再回写是纯无效功（O(列数)次拷贝），无需任何转换
     return data
@@ -5,17 +5,34 @@
 """
 
 import functools
+import sys
 import traceback
 import logging
 import time
 from typing import Any, Callable, Dict, List, Optional, Type
 from enum import Enum
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
-import streamlit as st
 
 logger = logging.getLogger(__name__)
 
+# streamlit模块引用缓存（延迟导入）
+_ST_MODULE = None
+
+
+def _st():
+    """
+    延迟导入streamlit并缓存模块引用
+
+    错误处理只在展示错误时才需要streamlit，顶层导入会让
+    工作进程/命令行场景也背上数百毫秒的启动开销。
+    """
+    global _ST_MODULE
+    if _ST_MODULE is None:
+        import streamlit
+        _ST_MODULE = streamlit
+    return _ST_MODULE
+
 class ErrorSeverity(Enum):
     """错误严重程度"""
     LOW = "low"           # 轻微错误，不影响主要功能
@@ -32,9 +49,13 @@ class ErrorCategory(Enum):
     SYSTEM = "system"            # 系统错误
     USER = "user"                # 用户操作错误
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ErrorInfo:
-    """错误信息数据类"""
+    """错误信息数据类
+
+    不可变实例：注册表中的模板可安全共享，按异常定制时用
+    dataclasses.replace只改动差异字段；slots省掉每实例的__dict__。
+    """
     error_id: str
     category: ErrorCategory
     severity: ErrorSeverity
@@ -50,6 +71,9 @@ class ErrorRegistry:
     
     def __init__(self):
         self.known_errors: Dict[Type[Exception], ErrorInfo] = {}
+        # MRO解析缓存：异常类型 -> 匹配到的模板（None表示未注册），
+        # 每个新类型只走一次__mro__遍历，后续查找为单次dict命中
+        self._mro_cache: Dict[type, Optional[ErrorInfo]] = {}
         self._register_common_errors()
     
     def _register_common_errors(self):
@@ -94,6 +118,27 @@ class ErrorRegistry:
             ["减少数据集大小", "关闭其他应用程序", "重启应用"],
             auto_recoverable=False
         )
+
+        # requests的网络异常不继承内置ConnectionError，需单独注册；
+        # 仅在requests已加载时注册，避免为此主动导入它
+        requests = sys.modules.get('requests')
+        if requests is not None:
+            self.register_error(
+                requests.exceptions.ConnectionError,
+                ErrorCategory.NETWORK,
+                ErrorSeverity.HIGH,
+                "网络连接失败",
+                ["检查网络连接", "稍后重试", "联系系统管理员"],
+                auto_recoverable=True
+            )
+            self.register_error(
+                requests.exceptions.Timeout,
+                ErrorCategory.NETWORK,
+                ErrorSeverity.HIGH,
+                "网络请求超时",
+                ["检查网络连接", "稍后重试"],
+                auto_recoverable=True
+            )
     
     def register_error(self, 
                       exception_type: Type[Exception],
@@ -117,24 +162,59 @@ class ErrorRegistry:
         )
         
         self.known_errors[exception_type] = error_info
-    
+        # 注册新类型后重建MRO缓存：先清空过期的解析结果，
+        # 再预填充所有已知类型的子类
+        self._reseed_mro_cache()
+
+    def _reseed_mro_cache(self):
+        """重建MRO解析缓存并预填充全部已知子类
+
+        把MRO遍历从子类异常的首次抛出挪到注册时，使其从第一个
+        实例起就是O(1)命中；每个子类仍按__mro__解析到最近的
+        已注册祖先，与惰性路径的语义完全一致。
+        """
+        self._mro_cache.clear()
+        stack = list(self.known_errors)
+        seen = set(stack)
+        while stack:
+            for sub in stack.pop().__subclasses__():
+                if sub not in seen:
+                    seen.add(sub)
+                    if sub not in self.known_errors:
+                        self._resolve_template(sub)
+                    stack.append(sub)
+
+    def _resolve_template(self, exception_type: type) -> Optional[ErrorInfo]:
+        """沿MRO解析异常类型对应的模板（带缓存）
+
+        精确匹配不到时沿__mro__向上查找，使已注册类型的子类
+        （如requests的ConnectTimeout之于ConnectionError）也能
+        命中相应条目；解析结果按类型缓存。
+        """
+        if exception_type in self._mro_cache:
+            return self._mro_cache[exception_type]
+
+        template = None
+        for cls in exception_type.__mro__:
+            if cls in self.known_errors:
+                template = self.known_errors[cls]
+                break
+
+        self._mro_cache[exception_type] = template
+        return template
+
     def get_error_info(self, exception: Exception) -> ErrorInfo:
         """获取错误信息"""
         exception_type = type(exception)
-        
-        if exception_type in self.known_errors:
-            error_info = self.known_errors[exception_type]
-            # 创建新实例以避免修改原始数据
-            return ErrorInfo(
-                error_id=error_info.error_id,
-                category=error_info.category,
-                severity=error_info.severity,
-                message=error_info.message,
+
+        template = self._resolve_template(exception_type)
+        if template is not None:
+            # 从模板派生新实例，只替换随异常变化的字段
+            return replace(
+                template,
                 technical_details=str(exception),
                 timestamp=datetime.now(),
-                function_name="",
-                recovery_suggestions=error_info.recovery_suggestions,
-                auto_recoverable=error_info.auto_recoverable
+                function_name=""
             )
         else:
             # 未知错误
@@ -165,6 +245,12 @@ class RetryConfig:
         self.delay = delay
         self.backoff_factor = backoff_factor
         self.max_delay = max_delay
+        # 重试等待时间表：构造时一次算好（最多max_attempts-1个值），
+        # 重试循环内免去幂运算和min比较
+        self.delays = tuple(
+            min(delay * (backoff_factor ** i), max_delay)
+            for i in range(max_attempts - 1)
+        )
 
 def with_error_handling(retry_config: Optional[RetryConfig] = None,
                        show_user_message: bool = True,
@@ -178,17 +264,32 @@ def with_error_handling(retry_config: Optional[RetryConfig] = None,
     - fallback_result: 失败时的备用结果
     """
     def decorator(func: Callable):
+        # 装饰期特化：无重试且无备用结果（最常见的用法）时，
+        # 包装层退化为一次try/except，不走重试循环和逐次簿记
+        if retry_config is None and fallback_result is None:
+            @functools.wraps(func)
+            def simple_wrapper(*args, **kwargs):
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"函数 {func.__name__} 执行失败: {e}")
+                    if show_user_message:
+                        display_error_message(replace(
+                            error_registry.get_error_info(e),
+                            function_name=func.__name__
+                        ))
+                    raise
+            return simple_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             attempts = 1
-            
+
             if retry_config:
                 max_attempts = retry_config.max_attempts
-                delay = retry_config.delay
             else:
                 max_attempts = 1
-                delay = 0
             
             for attempt in range(max_attempts):
                 try:
@@ -196,8 +297,10 @@ def with_error_handling(retry_config: Optional[RetryConfig] = None,
                     
                 except Exception as e:
                     last_exception = e
-                    error_info = error_registry.get_error_info(e)
-                    error_info.function_name = func.__name__
+                    error_info = replace(
+                        error_registry.get_error_info(e),
+                        function_name=func.__name__
+                    )
                     
                     logger.error(f"函数 {func.__name__} 执行失败 (尝试 {attempt + 1}/{max_attempts}): {e}")
                     
@@ -214,10 +317,9 @@ def with_error_handling(retry_config: Optional[RetryConfig] = None,
                         else:
                             raise e
                     
-                    # 等待后重试
+                    # 等待后重试（等待时间查预计算的时间表）
                     if attempt < max_attempts - 1:
-                        wait_time = min(delay * (retry_config.backoff_factor ** attempt), 
-                                      retry_config.max_delay)
+                        wait_time = retry_config.delays[attempt]
                         logger.info(f"等待 {wait_time:.1f} 秒后重试...")
                         time.sleep(wait_time)
             
@@ -228,19 +330,27 @@ def with_error_handling(retry_config: Optional[RetryConfig] = None,
         return wrapper
     return decorator
 
+# 严重程度 -> (消息前缀, streamlit方法名) 的分发表，
+# 替代逐级if/elif比较，一次哈希查找定位展示方式
+_SEVERITY_DISPLAY = {
+    ErrorSeverity.CRITICAL: ("🚨 严重错误: ", "error"),
+    ErrorSeverity.HIGH: ("❌ 错误: ", "error"),
+    ErrorSeverity.MEDIUM: ("⚠️ 警告: ", "warning"),
+    ErrorSeverity.LOW: ("ℹ️ 提示: ", "info"),
+}
+
+
 def display_error_message(error_info: ErrorInfo):
     """显示用户友好的错误消息"""
-    
-    # 根据严重程度选择显示方式
-    if error_info.severity == ErrorSeverity.CRITICAL:
-        st.error(f"🚨 严重错误: {error_info.message}")
-    elif error_info.severity == ErrorSeverity.HIGH:
-        st.error(f"❌ 错误: {error_info.message}")
-    elif error_info.severity == ErrorSeverity.MEDIUM:
-        st.warning(f"⚠️ 警告: {error_info.message}")
-    else:
-        st.info(f"ℹ️ 提示: {error_info.message}")
-    
+    st = _st()
+
+    # 根据严重程度选择显示方式（查表分发）
+    prefix, method = _SEVERITY_DISPLAY.get(
+        error_info.severity, _SEVERITY_DISPLAY[ErrorSeverity.LOW]
+    )
+    getattr(st, method)(prefix + error_info.message)
+
+
     # 显示恢复建议
     if error_info.recovery_suggestions:
         with st.expander("💡 解决建议", expanded=True):
@@ -256,8 +366,11 @@ def display_error_message(error_info: ErrorInfo):
 
 class CircuitBreaker:
     """熔断器 - 防止级联故障"""
-    
-    def __init__(self, 
+
+    __slots__ = ('failure_threshold', 'recovery_timeout', 'expected_exception',
+                 'failure_count', 'last_failure_time', 'state')
+
+    def __init__(self,
                  failure_threshold: int = 5,
                  recovery_timeout: float = 60.0,
                  expected_exception: Type[Exception] = Exception):
@@ -272,26 +385,38 @@ class CircuitBreaker:
     def __call__(self, func: Callable):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            # 快速路径：CLOSED是生产环境的常态，只记失败，
+            # 不做OPEN状态判断和超时计算
+            if self.state == "CLOSED":
+                try:
+                    result = func(*args, **kwargs)
+                except self.expected_exception:
+                    self._on_failure()
+                    raise
+                self._on_success()
+                return result
+
             if self.state == "OPEN":
                 if self._should_attempt_reset():
                     self.state = "HALF_OPEN"
                 else:
                     raise Exception("熔断器开启，服务暂时不可用")
-            
+
             try:
                 result = func(*args, **kwargs)
                 self._on_success()
                 return result
-                
+
             except self.expected_exception as e:
                 self._on_failure()
                 raise e
-        
+
         return wrapper
     
     def _should_attempt_reset(self) -> bool:
         """判断是否应该尝试重置"""
-        return (time.time() - self.last_failure_time) >= self.recovery_timeout
+        # monotonic不受系统时钟回拨影响，且比time()开销低
+        return (time.monotonic() - self.last_failure_time) >= self.recovery_timeout
     
     def _on_success(self):
         """成功时的处理"""
@@ -301,7 +426,7 @@ class CircuitBreaker:
     def _on_failure(self):
         """失败时的处理"""
         self.failure_count += 1
-        self.last_failure_time = time.time()
+        self.last_failure_time = time.monotonic()
         
         if self.failure_count >= self.failure_threshold:
             self.state = "OPEN"
@@ -324,6 +449,7 @@ def safe_execute(func: Callable, *args, **kwargs) -> tuple[bool, Any]:
 
 def create_error_recovery_ui():
     """创建错误恢复UI"""
+    st = _st()
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 🛡️ 错误恢复")
     
@@ -348,6 +474,7 @@ def create_error_recovery_ui():
 
 def show_error_history():
     """显示错误历史"""
+    st = _st()
     if 'error_history' not in st.session_state:
         st.session_state.error_history = []
     
@@ -360,6 +487,7 @@ def show_error_history():
 
 def log_error_to_history(error_info: ErrorInfo):
     """记录错误到历史"""
+    st = _st()
     if 'error_history' not in st.session_state:
         st.session_state.error_history = []
     
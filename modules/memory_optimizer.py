@@ -8,11 +8,12 @@ import gc
 import psutil
 import pandas as pd
 import numpy as np
-import pickle
 import gzip
+import sys
 import tempfile
 import os
 from typing import Any, Iterator, List, Optional, Union, Callable
+from collections import OrderedDict
 from dataclasses import dataclass
 from contextlib import contextmanager
 import streamlit as st
@@ -20,6 +21,39 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# 数值窄化的边界常量：模块级构建一次，不在列循环里反复创建iinfo/finfo
+_I8 = np.iinfo(np.int8)
+_I16 = np.iinfo(np.int16)
+_I32 = np.iinfo(np.int32)
+_U8 = np.iinfo(np.uint8)
+_U16 = np.iinfo(np.uint16)
+_U32 = np.iinfo(np.uint32)
+_F32 = np.finfo(np.float32)
+
+# 基数估算的抽样参数：超过阈值的列只抽样判断唯一值比例
+_CARDINALITY_SAMPLE_THRESHOLD = 50_000
+_CARDINALITY_SAMPLE_ROWS = 10_000
+
+# pandas 3起文本列推断为str dtype，select_dtypes需一并包含；
+# 旧版pandas传'str'会直接TypeError，按运行版本构建选择器
+_TEXT_DTYPES = (['object', 'str']
+                if int(pd.__version__.split('.')[0]) >= 3 else ['object'])
+
+
+def _unique_ratio(series: pd.Series) -> float:
+    """估算列的唯一值比例
+
+    长列抽样1万行计算——判断"是否低基数"只需比例的量级，
+    无需对千万行字符串做整列Python级哈希去重。
+    """
+    n = len(series)
+    if n == 0:
+        return 1.0
+    if n > _CARDINALITY_SAMPLE_THRESHOLD:
+        sample = series.sample(n=_CARDINALITY_SAMPLE_ROWS, random_state=0)
+        return sample.nunique() / len(sample)
+    return series.nunique() / n
+
 @dataclass
 class MemoryStats:
     """内存统计信息"""
@@ -35,18 +69,20 @@ class MemoryMonitor:
     def __init__(self, warning_threshold: float = 80.0, critical_threshold: float = 90.0):
         self.warning_threshold = warning_threshold
         self.critical_threshold = critical_threshold
+        # 进程句柄只建一次：每次psutil.Process()都要重开/proc/self/*
+        self._process = psutil.Process()
         self.initial_memory = self.get_memory_stats()
-    
+
     def get_memory_stats(self) -> MemoryStats:
         """获取当前内存统计"""
         try:
             # 系统内存
             memory = psutil.virtual_memory()
-            
-            # 当前进程内存
-            process = psutil.Process()
-            process_memory = process.memory_info().rss / 1024 / 1024  # MB
-            
+
+            # 当前进程内存（oneshot批量读取procfs，合并多次系统调用）
+            with self._process.oneshot():
+                process_memory = self._process.memory_info().rss / 1024 / 1024  # MB
+
             return MemoryStats(
                 total_mb=memory.total / 1024 / 1024,
                 used_mb=memory.used / 1024 / 1024,
@@ -69,58 +105,117 @@ class MemoryMonitor:
         else:
             return "normal"
     
+    def get_process_mb(self) -> float:
+        """只读取进程RSS（MB），跳过virtual_memory的系统级采样"""
+        try:
+            return self._process.memory_info().rss / 1024 / 1024
+        except Exception as e:
+            logger.error(f"获取进程内存失败: {e}")
+            return 0.0
+
     def get_memory_usage_delta(self) -> float:
         """获取内存使用变化"""
-        current = self.get_memory_stats()
-        return current.process_mb - self.initial_memory.process_mb
+        return self.get_process_mb() - self.initial_memory.process_mb
 
 class DataFrameOptimizer:
     """DataFrame内存优化器"""
     
     @staticmethod
-    def optimize_dtypes(df: pd.DataFrame, aggressive: bool = False) -> pd.DataFrame:
+    def to_arrow_backed(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        转换为pyarrow后端的DataFrame
+
+        数值列尽可能零拷贝映射为Arrow类型；低基数字符串列在Arrow层
+        做字典编码（索引+去重字典，字符串多的表可省数倍内存），
+        不再走astype('category')的Python级全列遍历
+
+        参数:
+        - df: 要转换的DataFrame
+
+        返回:
+        - pd.DataFrame: pyarrow后端的DataFrame
+        """
+        import pyarrow as pa
+
+        converted = df.convert_dtypes(dtype_backend='pyarrow')
+
+        n_rows = len(converted)
+        if n_rows:
+            dict_dtype = pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string()))
+            for col in converted.columns:
+                dtype = converted[col].dtype
+                if (isinstance(dtype, pd.ArrowDtype)
+                        and pa.types.is_string(dtype.pyarrow_dtype)
+                        and _unique_ratio(converted[col]) < 0.5):
+                    converted[col] = converted[col].astype(dict_dtype)
+
+        return converted
+
+    @staticmethod
+    def optimize_dtypes(df: pd.DataFrame, aggressive: bool = False,
+                        int2uint: bool = True,
+                        use_arrow: bool = False) -> pd.DataFrame:
         """
         优化DataFrame数据类型
-        
+
         参数:
         - df: 要优化的DataFrame
         - aggressive: 是否使用激进优化
-        
+        - int2uint: 非负整数列是否优先选无符号类型
+          （下游运算可能产生负数时置False保留有符号类型）
+        - use_arrow: 是否转换为pyarrow后端（见to_arrow_backed）
+
         返回:
         - pd.DataFrame: 优化后的DataFrame
         """
         original_memory = df.memory_usage(deep=True).sum() / 1024 / 1024
-        
-        optimized_df = df.copy()
-        
-        # 优化数值列
+
+        if use_arrow:
+            try:
+                optimized_df = DataFrameOptimizer.to_arrow_backed(df)
+                optimized_memory = optimized_df.memory_usage(deep=True).sum() / 1024 / 1024
+                reduction = (original_memory - optimized_memory) / original_memory * 100
+                logger.info(f"DataFrame内存优化(Arrow): {original_memory:.1f}MB -> "
+                            f"{optimized_memory:.1f}MB (减少{reduction:.1f}%)")
+                return optimized_df
+            except ImportError:
+                logger.warning("pyarrow不可用，回退到numpy窄化路径")
+
+        # 浅拷贝即可：写时复制语义下按列赋值不影响原frame，
+        # 未改动的列继续共享底层数据，免去整表深拷贝的内存峰值
+        optimized_df = df.copy(deep=False)
+
+        # 优化数值列：to_numeric(downcast=...)在C层一趟完成
+        # 范围扫描和窄化选型，替代Python级min/max加astype的三趟遍历
         for col in optimized_df.select_dtypes(include=['int64']).columns:
-            col_min = optimized_df[col].min()
-            col_max = optimized_df[col].max()
-            
-            if col_min >= -128 and col_max <= 127:
-                optimized_df[col] = optimized_df[col].astype('int8')
-            elif col_min >= -32768 and col_max <= 32767:
-                optimized_df[col] = optimized_df[col].astype('int16')
-            elif col_min >= -2147483648 and col_max <= 2147483647:
-                optimized_df[col] = optimized_df[col].astype('int32')
-        
+            values = optimized_df[col].to_numpy(copy=False)
+            # 非负列优先无符号：同样的上界下uint比int窄一档
+            # （如[0,255]存uint8而不是int16）
+            if int2uint and values.size and values.min() >= 0:
+                downcast = 'unsigned'
+            else:
+                downcast = 'integer'
+            optimized_df[col] = pd.to_numeric(optimized_df[col], downcast=downcast)
+
         for col in optimized_df.select_dtypes(include=['float64']).columns:
             if aggressive:
-                # 检查是否可以转换为int
-                if optimized_df[col].fillna(0) % 1 == 0:
+                # 整数值检测：与floor结果逐元素比对，
+                # 不构造% 1运算的全列临时数组
+                filled = optimized_df[col].fillna(0).to_numpy()
+                if (filled.size
+                        and np.isfinite(filled).all()
+                        and np.array_equal(filled, np.floor(filled))
+                        and -2147483648 <= filled.min()
+                        and filled.max() <= 2147483647):
                     optimized_df[col] = optimized_df[col].astype('Int32')
-                else:
-                    optimized_df[col] = optimized_df[col].astype('float32')
-            else:
-                optimized_df[col] = optimized_df[col].astype('float32')
+                    continue
+            optimized_df[col] = pd.to_numeric(optimized_df[col], downcast='float')
         
-        # 优化对象列
-        for col in optimized_df.select_dtypes(include=['object']).columns:
-            if optimized_df[col].dtype == 'object':
-                # 如果唯一值比例小于50%，转换为category
-                if optimized_df[col].nunique() / len(optimized_df) < 0.5:
-                    optimized_df[col] = optimized_df[col].astype('category')
+        # 优化对象/字符串列（选择器按pandas版本构建）
+        for col in optimized_df.select_dtypes(include=_TEXT_DTYPES).columns:
+            # 如果唯一值比例小于50%，转换为category（长列抽样估算）
+            if _unique_ratio(optimized_df[col]) < 0.5:
+                optimized_df[col] = optimized_df[col].astype('category')
         
         optimized_memory = optimized_df.memory_usage(deep=True).sum() / 1024 / 1024
         reduction = (original_memory - optimized_memory) / original_memory * 100
@@ -141,18 +236,47 @@ class DataFrameOptimizer:
         返回:
         - Iterator[pd.DataFrame]: DataFrame块的迭代器
         """
+        n = len(df)
+        # 行切片走内部快速切片器，跳过iloc的逐块索引校验；
+        # 私有API不可用时回退到iloc（语义相同）
+        slicer = getattr(df, '_slice', None)
+        if slicer is not None:
+            for i in range(0, n, chunk_size):
+                yield slicer(slice(i, i + chunk_size))
+        else:
+            for i in range(0, n, chunk_size):
+                yield df.iloc[i:i + chunk_size]
+
+    @staticmethod
+    def chunk_arrays(df: pd.DataFrame, chunk_size: int = 10000) -> Iterator[dict]:
+        """
+        以numpy视图分块遍历各列
+
+        面向接受ndarray的处理函数：每块只是底层数组的指针偏移切片，
+        完全不重建pandas的块管理器和索引
+
+        参数:
+        - df: 要分块的DataFrame
+        - chunk_size: 每块的大小
+
+        返回:
+        - Iterator[dict]: 列名 -> ndarray视图 的字典迭代器
+        """
+        arrays = {col: df[col].to_numpy(copy=False) for col in df.columns}
         for i in range(0, len(df), chunk_size):
-            yield df.iloc[i:i + chunk_size]
+            yield {col: arr[i:i + chunk_size] for col, arr in arrays.items()}
     
     @staticmethod
-    def reduce_memory_usage(df: pd.DataFrame, columns: List[str] = None) -> pd.DataFrame:
+    def reduce_memory_usage(df: pd.DataFrame, columns: List[str] = None,
+                            int2uint: bool = True) -> pd.DataFrame:
         """
         减少特定列的内存使用
-        
+
         参数:
         - df: DataFrame
         - columns: 要优化的列名列表，None表示所有列
-        
+        - int2uint: 非负整数列是否优先选无符号类型
+
         返回:
         - pd.DataFrame: 优化后的DataFrame
         """
@@ -161,24 +285,40 @@ class DataFrameOptimizer:
         
         for col in columns:
             if col in df.columns:
-                col_type = df[col].dtype
-                
-                if col_type != 'object':
-                    c_min = df[col].min()
-                    c_max = df[col].max()
-                    
-                    if str(col_type)[:3] == 'int':
-                        if c_min > np.iinfo(np.int8).min and c_max < np.iinfo(np.int8).max:
+                kind = getattr(df[col].dtype, 'kind', None)
+
+                if kind in ('i', 'f'):
+                    # 直接在底层连续数组上做两端点归约，
+                    # 免去pandas聚合的逐列封装开销
+                    values = df[col].to_numpy(copy=False)
+                    if not values.size:
+                        continue
+
+                    if kind == 'i':
+                        c_min = values.min()
+                        c_max = values.max()
+                        if int2uint and c_min >= 0:
+                            # 非负列优先无符号：同样的上界下窄一档
+                            if c_max < _U8.max:
+                                df[col] = df[col].astype(np.uint8)
+                            elif c_max < _U16.max:
+                                df[col] = df[col].astype(np.uint16)
+                            elif c_max < _U32.max:
+                                df[col] = df[col].astype(np.uint32)
+                        elif c_min > _I8.min and c_max < _I8.max:
                             df[col] = df[col].astype(np.int8)
-                        elif c_min > np.iinfo(np.int16).min and c_max < np.iinfo(np.int16).max:
+                        elif c_min > _I16.min and c_max < _I16.max:
                             df[col] = df[col].astype(np.int16)
-                        elif c_min > np.iinfo(np.int32).min and c_max < np.iinfo(np.int32).max:
+                        elif c_min > _I32.min and c_max < _I32.max:
                             df[col] = df[col].astype(np.int32)
-                    
-                    elif str(col_type)[:5] == 'float':
-                        if c_min > np.finfo(np.float32).min and c_max < np.finfo(np.float32).max:
+
+                    else:
+                        # float列用nan*归约，与pandas聚合一致地跳过缺失值
+                        c_min = np.nanmin(values)
+                        c_max = np.nanmax(values)
+                        if c_min > _F32.min and c_max < _F32.max:
                             df[col] = df[col].astype(np.float32)
-        
+
         return df
 
 class ChunkedProcessor:
@@ -188,6 +328,41 @@ class ChunkedProcessor:
         self.chunk_size = chunk_size
         self.memory_limit_mb = memory_limit_mb
         self.monitor = MemoryMonitor()
+        # 自适应内存采样：连续正常时逐步拉大间隔，
+        # 小块快处理的场景不再每块都付psutil系统调用
+        self._sample_interval = 1
+        self._chunks_since_sample = 0
+        self._normal_streak = 0
+        self._last_rss_mb = 0.0
+
+    def _sample_memory_status(self):
+        """采样内存状态并自适应调整采样间隔，临界时触发回收"""
+        current_rss = self.monitor.get_process_mb()
+        # 进程RSS没怎么涨时跳过系统级virtual_memory采样——
+        # 不是本循环在推高内存，无需为它逐次全量检查
+        if self._last_rss_mb > 0 and current_rss - self._last_rss_mb <= 50:
+            return
+        self._last_rss_mb = current_rss
+
+        memory_status = self.monitor.check_memory_status()
+
+        if memory_status == "critical":
+            logger.warning("内存使用率过高，触发垃圾回收")
+            gc.collect()
+
+            # 再次检查
+            memory_status = self.monitor.check_memory_status()
+            if memory_status == "critical":
+                raise MemoryError("内存不足，无法继续处理")
+
+        if memory_status == "normal":
+            self._normal_streak += 1
+            if self._normal_streak >= 3 and self._sample_interval < 16:
+                self._sample_interval *= 2
+                self._normal_streak = 0
+        else:
+            self._normal_streak = 0
+            self._sample_interval = 1
     
     def process_large_dataset(self, 
                             data: Union[pd.DataFrame, List], 
@@ -212,24 +387,18 @@ class ChunkedProcessor:
             chunks = [data[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)]
         
         for i, chunk in enumerate(chunks):
-            # 检查内存状态
-            memory_status = self.monitor.check_memory_status()
-            
-            if memory_status == "critical":
-                logger.warning("内存使用率过高，触发垃圾回收")
-                gc.collect()
-                
-                # 再次检查
-                memory_status = self.monitor.check_memory_status()
-                if memory_status == "critical":
-                    raise MemoryError("内存不足，无法继续处理")
-            
+            # 检查内存状态（按自适应间隔采样，而非每块都读procfs）
+            self._chunks_since_sample += 1
+            if self._chunks_since_sample >= self._sample_interval:
+                self._chunks_since_sample = 0
+                self._sample_memory_status()
+
             # 处理当前块
             try:
                 result = process_func(chunk)
                 results.append(result)
                 
-                logger.info(f"已处理块 {i + 1}, 内存使用: {self.monitor.get_memory_stats().process_mb:.1f}MB")
+                logger.info(f"已处理块 {i + 1}, 内存使用: {self.monitor.get_process_mb():.1f}MB")
                 
             except Exception as e:
                 logger.error(f"处理块 {i + 1} 失败: {e}")
@@ -243,43 +412,71 @@ class ChunkedProcessor:
         else:
             return results
 
+def _deep_getsizeof(obj: Any, seen: set) -> int:
+    """递归估算容器对象的字节数（按id去重，避免共享引用重复计数）"""
+    obj_id = id(obj)
+    if obj_id in seen:
+        return 0
+    seen.add(obj_id)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_getsizeof(k, seen) + _deep_getsizeof(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_getsizeof(item, seen) for item in obj)
+    elif isinstance(obj, np.ndarray):
+        size += obj.nbytes
+    return size
+
+
 class MemoryCache:
     """内存缓存管理器"""
     
     def __init__(self, max_size_mb: float = 100):
         self.max_size_mb = max_size_mb
-        self.cache = {}
-        self.access_times = {}
+        # OrderedDict隐式记录访问顺序：命中move_to_end、淘汰popitem(last=False)
+        # 都是O(1)，且不再为每次访问构造pd.Timestamp
+        self.cache = OrderedDict()
         self.sizes = {}
-    
+
     def get(self, key: str) -> Optional[Any]:
         """获取缓存项"""
         if key in self.cache:
-            self.access_times[key] = pd.Timestamp.now()
+            self.cache.move_to_end(key)
             return self.cache[key]
         return None
-    
+
     def put(self, key: str, value: Any):
         """添加缓存项"""
         # 估算大小
         size_mb = self._estimate_size(value)
-        
+
         # 检查是否需要清理
         while self._get_total_size() + size_mb > self.max_size_mb and self.cache:
             self._evict_lru()
-        
+
         self.cache[key] = value
-        self.access_times[key] = pd.Timestamp.now()
+        self.cache.move_to_end(key)
         self.sizes[key] = size_mb
     
     def _estimate_size(self, obj: Any) -> float:
-        """估算对象大小（MB）"""
+        """估算对象大小（MB）
+
+        按类型直读字节数，不再为测量而pickle整个对象——
+        序列化一个100MB的值只为知道它多大，put本身就翻倍了内存峰值。
+        """
         try:
             if isinstance(obj, pd.DataFrame):
                 return obj.memory_usage(deep=True).sum() / 1024 / 1024
-            else:
-                return len(pickle.dumps(obj)) / 1024 / 1024
-        except:
+            if isinstance(obj, pd.Series):
+                return obj.memory_usage(deep=True) / 1024 / 1024
+            if isinstance(obj, np.ndarray):
+                return obj.nbytes / 1024 / 1024
+            if isinstance(obj, (bytes, bytearray)):
+                return len(obj) / 1024 / 1024
+            return _deep_getsizeof(obj, set()) / 1024 / 1024
+        except Exception:
             return 1.0  # 默认1MB
     
     def _get_total_size(self) -> float:
@@ -287,20 +484,16 @@ class MemoryCache:
         return sum(self.sizes.values())
     
     def _evict_lru(self):
-        """移除最近最少使用的项"""
-        if not self.access_times:
+        """移除最近最少使用的项（队首即最久未访问）"""
+        if not self.cache:
             return
-        
-        lru_key = min(self.access_times.keys(), key=lambda k: self.access_times[k])
-        
-        del self.cache[lru_key]
-        del self.access_times[lru_key]
-        del self.sizes[lru_key]
-    
+
+        lru_key, _ = self.cache.popitem(last=False)
+        self.sizes.pop(lru_key, None)
+
     def clear(self):
         """清空缓存"""
         self.cache.clear()
-        self.access_times.clear()
         self.sizes.clear()
 
 @contextmanager
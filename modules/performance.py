@@ -18,6 +18,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 模块级进程句柄：psutil.Process()每次构造都要重开/proc/self/*，
+# 监控采样共享同一个句柄即可
+_PROCESS = psutil.Process()
+
 class PerformanceMonitor:
     """性能监控器"""
     
@@ -32,13 +36,13 @@ class PerformanceMonitor:
         """开始监控"""
         self.function_name = function_name
         self.start_time = time.time()
-        self.start_memory = psutil.Process().memory_info().rss
+        self.start_memory = _PROCESS.memory_info().rss
         logger.info(f"开始执行: {function_name}")
     
     def stop(self):
         """停止监控"""
         self.end_time = time.time()
-        self.end_memory = psutil.Process().memory_info().rss
+        self.end_memory = _PROCESS.memory_info().rss
         
         execution_time = self.end_time - self.start_time
         memory_delta = (self.end_memory - self.start_memory) / 1024 / 1024  # MB
@@ -222,27 +226,11 @@ def optimize_dataframe(df):
     - pandas.DataFrame: 优化后的DataFrame
     """
     try:
-        original_memory = df.memory_usage(deep=True).sum() / 1024 / 1024  # MB
-        
-        # 优化数值列
-        for col in df.select_dtypes(include=['int64']).columns:
-            df[col] = df[col].astype('int32')
-        
-        for col in df.select_dtypes(include=['float64']).columns:
-            df[col] = df[col].astype('float32')
-        
-        # 优化对象列
-        for col in df.select_dtypes(include=['object']).columns:
-            if df[col].nunique() / len(df) < 0.5:  # 如果唯一值比例小于50%
-                df[col] = df[col].astype('category')
-        
-        optimized_memory = df.memory_usage(deep=True).sum() / 1024 / 1024  # MB
-        reduction = (original_memory - optimized_memory) / original_memory * 100
-        
-        logger.info(f"DataFrame内存优化: {original_memory:.1f}MB -> {optimized_memory:.1f}MB (减少{reduction:.1f}%)")
-        
-        return df
-        
+        # 统一委托给DataFrameOptimizer的单一实现，
+        # 避免两份窄化逻辑各自维护（函数内导入避免模块级依赖环）
+        from .memory_optimizer import DataFrameOptimizer
+        return DataFrameOptimizer.optimize_dtypes(df)
+
     except Exception as e:
         logger.warning(f"DataFrame优化失败: {e}")
         return df
@@ -4,6 +4,11 @@
 包含光伏发电、风力发电和微电网调度模拟功能
 """
 
+import functools
+import os
+import threading
+from dataclasses import dataclass
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -13,6 +18,206 @@ from windpowerlib import WindTurbine, ModelChain as WindModelChain
 from .config import get_config, get_wind_turbine_info
 from .performance import monitor_calculation
 
+# numba编译缓存目录（首次编译约10秒，缓存后直接加载机器码）
+os.environ.setdefault(
+    'NUMBA_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.numba_cache')
+)
+
+from numba import njit, types
+
+# numba数组类型：输入序列声明为只读——pandas 3写时复制下
+# Series.to_numpy()返回只读视图，可写f4[:]签名会在派发时直接
+# TypeError；只有5个输出缓冲区保持可写
+_F4_IN = types.Array(types.float32, 1, 'C', readonly=True)
+_F4_OUT = types.Array(types.float32, 1, 'C')
+
+# 调度循环的numba签名（与modules/_dispatch_aot.py的AOT导出共用）
+_DISPATCH_SIGNATURE = types.void(
+    _F4_IN, _F4_IN, _F4_IN,
+    types.float64, types.float64, types.float64, types.float64,
+    _F4_OUT, _F4_OUT, _F4_OUT, _F4_OUT, _F4_OUT,
+)
+
+
+def _dispatch_loop(load, solar, wind, battery_capacity_kwh, battery_power_kw,
+                   initial_soc_kwh, round_trip_efficiency,
+                   battery_charge, battery_discharge, battery_soc,
+                   grid_buy, grid_sell):
+    """
+    逐小时调度核心循环（numba编译，结果写入预分配的输出数组）
+
+    在float32数组上完成电池充放电、电网购售电的调度计算，
+    使用min/max无分支裁剪代替if/else，编译后比纯Python循环快数十倍。
+
+    参数:
+    - load, solar, wind: np.ndarray, 逐小时功率序列 (kW)
+    - battery_capacity_kwh: float, 电池容量 (kWh)
+    - battery_power_kw: float, 电池最大充/放电功率 (kW)
+    - initial_soc_kwh: float, 电池初始电量 (kWh)
+    - round_trip_efficiency: float, 电池往返效率
+    - battery_charge/battery_discharge/battery_soc/grid_buy/grid_sell:
+      np.ndarray, 输出数组（由调用方预分配）
+    """
+    soc_kwh = initial_soc_kwh
+
+    for i in range(load.shape[0]):
+        net_load_kw = load[i] - solar[i] - wind[i]
+
+        # 电力不足部分：优先电池放电，剩余从电网购买
+        deficit_kw = max(net_load_kw, 0.0)
+        discharge_kw = min(min(battery_power_kw, soc_kwh), deficit_kw)
+        soc_kwh -= discharge_kw
+
+        # 电力过剩部分：优先电池充电，剩余向电网售电
+        excess_kw = max(-net_load_kw, 0.0)
+        headroom_kw = (battery_capacity_kwh - soc_kwh) / round_trip_efficiency
+        charge_kw = min(min(battery_power_kw, headroom_kw), excess_kw)
+        soc_kwh += charge_kw * round_trip_efficiency
+
+        battery_charge[i] = charge_kw
+        battery_discharge[i] = discharge_kw
+        battery_soc[i] = soc_kwh
+        grid_buy[i] = deficit_kw - discharge_kw
+        grid_sell[i] = excess_kw - charge_kw
+
+
+# 优先使用AOT预编译产物（见modules/_dispatch_aot.py），
+# 不存在时回退到JIT编译（cache=True使编译开销只在首次运行支付）
+try:
+    from .dispatch_aot import dispatch as _dispatch_compiled
+except ImportError:
+    _dispatch_compiled = njit(_DISPATCH_SIGNATURE, cache=True, fastmath=True)(_dispatch_loop)
+
+
+# 调度输出缓冲区（线程局部）：同一工作线程的多次模拟复用同一组数组，
+# 避免每次点击"运行"都重新分配5个全年序列。结果DataFrame组装时会把
+# 各列整合复制进独立的内存块，因此缓冲区在下一次运行时可安全覆写。
+_SIM_BUFFERS = threading.local()
+
+
+def _get_dispatch_buffers(n):
+    """获取(或按需重建)长度为n的5个float32输出缓冲区"""
+    cached = getattr(_SIM_BUFFERS, 'arrays', None)
+    if cached is None or cached[0].shape[0] != n:
+        cached = tuple(np.empty(n, dtype=np.float32) for _ in range(5))
+        _SIM_BUFFERS.arrays = cached
+    return cached
+
+
+def _dispatch_kernel(load, solar, wind, battery_capacity_kwh, battery_power_kw,
+                     initial_soc_kwh, round_trip_efficiency):
+    """
+    执行逐小时调度计算，返回各能量流序列
+
+    返回:
+    - tuple: (battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell) 数组
+    """
+    n = load.shape[0]
+    battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell = \
+        _get_dispatch_buffers(n)
+
+    if battery_capacity_kwh <= 0.0 or battery_power_kw <= 0.0:
+        # 无电池时各小时相互独立（没有SOC状态串联），
+        # 直接用整列向量化计算代替逐小时循环
+        net_load = load - solar - wind
+        np.maximum(net_load, 0.0, out=grid_buy)
+        np.maximum(-net_load, 0.0, out=grid_sell)
+        battery_charge.fill(0.0)
+        battery_discharge.fill(0.0)
+        battery_soc.fill(np.float32(initial_soc_kwh))
+        return battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell
+
+    _dispatch_compiled(
+        load, solar, wind,
+        battery_capacity_kwh, battery_power_kw,
+        initial_soc_kwh, round_trip_efficiency,
+        battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell
+    )
+
+    return battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell
+
+
+@dataclass(slots=True)
+class DispatchResult:
+    """
+    调度模拟结果的SoA（struct-of-arrays）容器
+
+    每个字段都是连续的float32数组，直接来自调度核心的输出，
+    按列访问零拷贝、缓存友好，避免了混合dtype DataFrame的列提取开销。
+    """
+    index: pd.Index
+    mine_load_kw: np.ndarray
+    solar_power_kw: np.ndarray
+    wind_power_kw: np.ndarray
+    renewable_total_kw: np.ndarray
+    net_load_kw: np.ndarray
+    battery_charge_kw: np.ndarray
+    battery_discharge_kw: np.ndarray
+    battery_soc_kwh: np.ndarray
+    battery_soc_percent: np.ndarray
+    grid_buy_kw: np.ndarray
+    grid_sell_kw: np.ndarray
+    grid_cost_usd: np.ndarray
+    grid_revenue_usd: np.ndarray
+    net_grid_cost_usd: np.ndarray
+
+    def to_dataframe(self):
+        """
+        转换为对外的结果DataFrame（列顺序与历史格式一致）
+
+        所有列同为float32，pandas将其合并为单一连续块，
+        下游按列读取即为零拷贝视图。
+        """
+        columns = {
+            name: getattr(self, name)
+            for name in self.__dataclass_fields__
+            if name != 'index'
+        }
+        df = pd.DataFrame(columns, index=self.index)
+        df.index.name = 'timestamp'
+        return df
+
+
+@functools.lru_cache(maxsize=64)
+def _solar_position_table(latitude_bin, longitude_bin, start_ns, periods, method):
+    """
+    按(纬度, 经度, 时间范围, 算法)缓存整年太阳位置几何计算结果
+
+    太阳位置计算包含大量三角函数调用（赤纬角、天顶角、时差方程等），
+    对同一地点和年份的重复模拟可以直接复用，避免每次运行重算8760小时。
+
+    返回:
+    - pandas.DataFrame: pvlib太阳位置表（调用方需copy后再修改）
+    """
+    times = pd.date_range(start=pd.Timestamp(start_ns), periods=periods, freq='h')
+    location = pvlib.location.Location(latitude_bin, longitude_bin, tz='UTC')
+    return pvlib.location.Location.get_solarposition(location, times, method=method)
+
+
+class _CachedSolarPositionLocation(pvlib.location.Location):
+    """按参数缓存太阳位置计算的Location子类，供ModelChain内部调用"""
+
+    def get_solarposition(self, times, method='nrel_numpy', **kwargs):
+        # 仅缓存无时区的规则小时序列（气象数据的标准形态）
+        cacheable = (
+            not kwargs
+            and getattr(times, 'tz', None) is None
+            and len(times) > 1
+            and (times.freq is not None or pd.infer_freq(times[:3]) in ('h', 'H'))
+        )
+        if cacheable:
+            try:
+                table = _solar_position_table(
+                    round(self.latitude, 2), round(self.longitude, 2),
+                    times[0].value, len(times), method
+                )
+                return table.copy()
+            except Exception:
+                pass
+        return super().get_solarposition(times, method=method, **kwargs)
+
+
 @st.cache_data
 @monitor_calculation
 def calculate_solar_power(weather_data, pv_capacity_mw, latitude, longitude):
@@ -32,14 +237,14 @@ def calculate_solar_power(weather_data, pv_capacity_mw, latitude, longitude):
         if pv_capacity_mw <= 0:
             # 如果装机容量为0，返回全零序列
             zero_series = pd.Series(
-                data=np.zeros(len(weather_data)),
+                data=np.zeros(len(weather_data), dtype=np.float32),
                 index=weather_data.index,
                 name='光伏发电功率_kW'
             )
             return zero_series
         
-        # 创建地理位置对象
-        location = pvlib.location.Location(
+        # 创建地理位置对象（太阳位置几何计算结果按地点/年份缓存）
+        location = _CachedSolarPositionLocation(
             latitude=latitude,
             longitude=longitude,
             tz='UTC'
@@ -148,10 +353,9 @@ def calculate_solar_power(weather_data, pv_capacity_mw, latitude, longitude):
             'wind_speed': weather_data['windspeed_10m']  # 风速 (m/s)
         }, index=weather_data.index)
 
-        # 确保辐射数据为非负值
-        weather_pvlib['ghi'] = weather_pvlib['ghi'].clip(lower=0)
-        weather_pvlib['dni'] = weather_pvlib['dni'].clip(lower=0)
-        weather_pvlib['dhi'] = weather_pvlib['dhi'].clip(lower=0)
+        # 确保辐射数据为非负值（三列一次性整块裁剪）
+        irradiance_cols = ['ghi', 'dni', 'dhi']
+        weather_pvlib[irradiance_cols] = weather_pvlib[irradiance_cols].clip(lower=0)
 
         # 检查数据有效性
         if weather_pvlib['ghi'].sum() == 0:
@@ -174,8 +378,8 @@ def calculate_solar_power(weather_data, pv_capacity_mw, latitude, longitude):
         # 转换为kW
         ac_power_kw = ac_power_w / 1000
         
-        # 确保输出为正值
-        ac_power_kw = ac_power_kw.clip(lower=0)
+        # 确保输出为正值，并降为float32（精度对kWh级核算足够，内存减半）
+        ac_power_kw = ac_power_kw.clip(lower=0).astype(np.float32, copy=False)
         
         # 设置Series名称
         ac_power_kw.name = '光伏发电功率_kW'
@@ -186,13 +390,58 @@ def calculate_solar_power(weather_data, pv_capacity_mw, latitude, longitude):
         st.error(f"光伏发电计算失败: {str(e)}")
         # 返回全零序列作为备选
         zero_series = pd.Series(
-            data=np.zeros(len(weather_data)),
+            data=np.zeros(len(weather_data), dtype=np.float32),
             index=weather_data.index,
             name='光伏发电功率_kW'
         )
         return zero_series
 
 
+@njit(_F4_OUT(_F4_IN, types.float64, types.float64, types.float64,
+              types.float64, types.float64),
+      cache=True, fastmath=True)
+def _wind_power_curve_kernel(wind_speed, cut_in, rated_speed, cut_out,
+                             rated_power_kw, num_turbines):
+    """
+    解析风机功率曲线（numba编译）：切入风速前为0，切入-额定区间按
+    立方律爬升，额定-切出区间输出额定功率，超过切出风速停机。
+
+    单次遍历即计算全部机组的合计出力，用作windpowerlib
+    功率曲线模型不可用时的备选计算路径。
+    """
+    out = np.empty(wind_speed.shape[0], dtype=np.float32)
+    ramp_span = rated_speed - cut_in
+
+    for i in range(wind_speed.shape[0]):
+        v = wind_speed[i]
+        if v < cut_in or v > cut_out:
+            power_kw = 0.0
+        elif v < rated_speed:
+            ratio = (v - cut_in) / ramp_span
+            power_kw = rated_power_kw * ratio * ratio * ratio
+        else:
+            power_kw = rated_power_kw
+        out[i] = power_kw * num_turbines
+
+    return out
+
+
+def _analytic_wind_power(weather_data, turbine_info, num_turbines):
+    """使用解析功率曲线计算风电出力（windpowerlib失败时的降级路径）"""
+    wind_speed = np.ascontiguousarray(
+        weather_data['windspeed_10m'].to_numpy(), dtype=np.float32
+    )
+    total_power_kw = _wind_power_curve_kernel(
+        wind_speed,
+        turbine_info['cut_in_speed'],
+        turbine_info['rated_speed'],
+        turbine_info['cut_out_speed'],
+        turbine_info['rated_power'],
+        num_turbines
+    )
+    return pd.Series(total_power_kw, index=weather_data.index, name='风力发电功率_kW')
+
+
 @st.cache_data
 def calculate_wind_power(weather_data, turbine_model, num_turbines):
     """
@@ -210,7 +459,7 @@ def calculate_wind_power(weather_data, turbine_model, num_turbines):
         if num_turbines <= 0:
             # 如果风机数量为0，返回全零序列
             zero_series = pd.Series(
-                data=np.zeros(len(weather_data)),
+                data=np.zeros(len(weather_data), dtype=np.float32),
                 index=weather_data.index,
                 name='风力发电功率_kW'
             )
@@ -254,8 +503,8 @@ def calculate_wind_power(weather_data, turbine_model, num_turbines):
         # 乘以风机数量并转换为kW
         total_power_kw = (power_output_w * num_turbines) / 1000
 
-        # 确保输出为正值
-        total_power_kw = total_power_kw.clip(lower=0)
+        # 确保输出为正值，并降为float32（精度对kWh级核算足够，内存减半）
+        total_power_kw = total_power_kw.clip(lower=0).astype(np.float32, copy=False)
 
         # 设置Series名称
         total_power_kw.name = '风力发电功率_kW'
@@ -264,9 +513,16 @@ def calculate_wind_power(weather_data, turbine_model, num_turbines):
 
     except Exception as e:
         st.error(f"风力发电计算失败: {str(e)}")
-        # 返回全零序列作为备选
+        # 降级为解析功率曲线计算（优于直接返回全零序列）
+        try:
+            turbine_info = get_wind_turbine_info(turbine_model)
+            st.info("已降级为解析功率曲线模型计算风电出力")
+            return _analytic_wind_power(weather_data, turbine_info, num_turbines)
+        except Exception as fallback_error:
+            st.error(f"解析功率曲线降级计算失败: {str(fallback_error)}")
+        # 风机参数也不可用时，返回全零序列作为最终备选
         zero_series = pd.Series(
-            data=np.zeros(len(weather_data)),
+            data=np.zeros(len(weather_data), dtype=np.float32),
             index=weather_data.index,
             name='风力发电功率_kW'
         )
@@ -300,100 +556,52 @@ def run_simulation(mine_load, solar_power, wind_power, battery_capacity_mwh, bat
         battery_capacity_kwh = battery_capacity_mwh * 1000  # MWh -> kWh
         battery_power_kw = battery_power_mw * 1000  # MW -> kW
 
-        # 初始化结果存储
-        results = []
-
-        # 电池状态变量
-        battery_soc_kwh = battery_capacity_kwh * 0.5  # 初始SOC为50%
-
-        # 逐小时模拟
-        for i in range(len(mine_load)):
-            # 当前时刻的数据
-            load_kw = mine_load.iloc[i]
-            solar_kw = solar_power.iloc[i]
-            wind_kw = wind_power.iloc[i]
-
-            # 计算可再生能源总发电量
-            renewable_generation_kw = solar_kw + wind_kw
-
-            # 计算净负荷（负荷减去可再生能源发电）
-            net_load_kw = load_kw - renewable_generation_kw
-
-            # 初始化本时刻的能量流向
-            battery_charge_kw = 0
-            battery_discharge_kw = 0
-            grid_buy_kw = 0
-            grid_sell_kw = 0
-
-            if net_load_kw > 0:
-                # 电力不足，需要从电池放电或从电网购电
-                # 优先使用电池
-                max_discharge = min(
-                    battery_power_kw,  # 电池功率限制
-                    battery_soc_kwh,   # 电池可用电量限制
-                    net_load_kw        # 实际需求限制
-                )
-
-                battery_discharge_kw = max_discharge
-                battery_soc_kwh -= battery_discharge_kw
-
-                # 剩余不足部分从电网购买
-                remaining_deficit = net_load_kw - battery_discharge_kw
-                if remaining_deficit > 0:
-                    grid_buy_kw = remaining_deficit
-
-            else:
-                # 电力过剩，可以给电池充电或向电网售电
-                excess_power_kw = -net_load_kw
-
-                # 优先给电池充电
-                max_charge = min(
-                    battery_power_kw,  # 电池功率限制
-                    (battery_capacity_kwh - battery_soc_kwh) / round_trip_efficiency,  # 电池容量限制
-                    excess_power_kw    # 可用过剩电量限制
-                )
-
-                battery_charge_kw = max_charge
-                battery_soc_kwh += battery_charge_kw * round_trip_efficiency
-
-                # 剩余过剩电量向电网售电
-                remaining_excess = excess_power_kw - battery_charge_kw
-                if remaining_excess > 0:
-                    grid_sell_kw = remaining_excess
-
-            # 计算经济指标
-            grid_cost_usd = grid_buy_kw * grid_purchase_price / 1000  # kW -> MW, $/MWh
-            grid_revenue_usd = grid_sell_kw * grid_sell_price / 1000
-
-            # 计算电池SOC百分比
-            battery_soc_percent = (battery_soc_kwh / battery_capacity_kwh) * 100
-
-            # 记录本时刻结果
-            hour_result = {
-                'timestamp': mine_load.index[i],
-                'mine_load_kw': load_kw,
-                'solar_power_kw': solar_kw,
-                'wind_power_kw': wind_kw,
-                'renewable_total_kw': renewable_generation_kw,
-                'net_load_kw': net_load_kw,
-                'battery_charge_kw': battery_charge_kw,
-                'battery_discharge_kw': battery_discharge_kw,
-                'battery_soc_kwh': battery_soc_kwh,
-                'battery_soc_percent': battery_soc_percent,
-                'grid_buy_kw': grid_buy_kw,
-                'grid_sell_kw': grid_sell_kw,
-                'grid_cost_usd': grid_cost_usd,
-                'grid_revenue_usd': grid_revenue_usd,
-                'net_grid_cost_usd': grid_cost_usd - grid_revenue_usd
-            }
+        # 预转换为连续float32数组，供numba核心函数使用（内存减半、SIMD吞吐翻倍）
+        load_arr = np.ascontiguousarray(mine_load.to_numpy(), dtype=np.float32)
+        solar_arr = np.ascontiguousarray(solar_power.to_numpy(), dtype=np.float32)
+        wind_arr = np.ascontiguousarray(wind_power.to_numpy(), dtype=np.float32)
+
+        # 逐小时调度计算（编译后的核心循环）
+        battery_charge, battery_discharge, battery_soc, grid_buy, grid_sell = _dispatch_kernel(
+            load_arr, solar_arr, wind_arr,
+            battery_capacity_kwh, battery_power_kw,
+            battery_capacity_kwh * 0.5,  # 初始SOC为50%
+            round_trip_efficiency
+        )
 
-            results.append(hour_result)
+        # 计算派生序列（整列向量化）
+        renewable_total = solar_arr + wind_arr
+        net_load = load_arr - renewable_total
+        grid_cost = grid_buy * grid_purchase_price / 1000  # kW -> MW, $/MWh
+        grid_revenue = grid_sell * grid_sell_price / 1000
 
-        # 转换为DataFrame
-        results_df = pd.DataFrame(results)
-        results_df.set_index('timestamp', inplace=True)
+        # 计算电池SOC百分比（容量为0时记为0，避免除零）
+        if battery_capacity_kwh > 0:
+            battery_soc_percent = (battery_soc / battery_capacity_kwh) * 100
+        else:
+            battery_soc_percent = np.zeros_like(battery_soc)
+
+        # 组装SoA结果结构（全部为float32数组，按列零拷贝）
+        result = DispatchResult(
+            index=mine_load.index,
+            mine_load_kw=load_arr,
+            solar_power_kw=solar_arr,
+            wind_power_kw=wind_arr,
+            renewable_total_kw=renewable_total,
+            net_load_kw=net_load,
+            battery_charge_kw=battery_charge,
+            battery_discharge_kw=battery_discharge,
+            battery_soc_kwh=battery_soc,
+            battery_soc_percent=battery_soc_percent.astype(np.float32, copy=False),
+            grid_buy_kw=grid_buy,
+            grid_sell_kw=grid_sell,
+            grid_cost_usd=grid_cost,
+            grid_revenue_usd=grid_revenue,
+            net_grid_cost_usd=grid_cost - grid_revenue
+        )
 
-        return results_df
+        # 对外仍返回DataFrame（下游分析/缓存/可视化的既有契约）
+        return result.to_dataframe()
 
     except Exception as e:
         st.error(f"微电网调度模拟失败: {str(e)}")
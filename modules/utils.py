@@ -7,46 +7,26 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from .config import UNIT_CONVERSION_FACTORS
 
 def convert_units(value, from_unit, to_unit):
     """
     单位转换函数
-    
+
     参数:
     - value: float, 要转换的数值
     - from_unit: str, 源单位
     - to_unit: str, 目标单位
-    
+
     返回:
     - float: 转换后的数值
     """
-    # 功率单位转换
-    power_conversions = {
-        ('kW', 'MW'): 0.001,
-        ('MW', 'kW'): 1000,
-        ('kW', 'W'): 1000,
-        ('W', 'kW'): 0.001,
-        ('MW', 'GW'): 0.001,
-        ('GW', 'MW'): 1000
-    }
-    
-    # 能量单位转换
-    energy_conversions = {
-        ('kWh', 'MWh'): 0.001,
-        ('MWh', 'kWh'): 1000,
-        ('MWh', 'GWh'): 0.001,
-        ('GWh', 'MWh'): 1000,
-        ('kWh', 'GWh'): 0.000001,
-        ('GWh', 'kWh'): 1000000
-    }
-    
-    # 合并转换字典
-    conversions = {**power_conversions, **energy_conversions}
-    
-    conversion_key = (from_unit, to_unit)
-    
-    if conversion_key in conversions:
-        return value * conversions[conversion_key]
+    # 系数表在config中导入时构建一次，这里只做一次哈希查找，
+    # 不再每次调用都重建两个转换字典
+    factor = UNIT_CONVERSION_FACTORS.get((from_unit, to_unit))
+
+    if factor is not None:
+        return value * factor
     elif from_unit == to_unit:
         return value
     else: